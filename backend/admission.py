@@ -0,0 +1,240 @@
+"""
+Admission control for the upstream services.
+
+A Limiter caps concurrent requests and, through a token bucket, the rate at
+which new ones start. Requests that can't start right away wait in a
+priority queue (LIVE before BACKGROUND, FIFO within a priority) until a
+deadline, then fail with Busy so callers can tell the client instead of
+hammering a rate-limited API. Slots can be taken from threads (acquire) or
+coroutines (acquire_async); release() is safe from either.
+"""
+import asyncio
+import contextlib
+import heapq
+import itertools
+import threading
+import time
+
+from metrics import admission_wait, admission_queue_depth, admission_in_flight, admission_rejected
+
+# Priorities: live feedback and session starts ahead of post-session work
+LIVE = 0
+BACKGROUND = 1
+
+PRIORITY_NAMES = {LIVE: "live", BACKGROUND: "background"}
+
+
+class Busy(Exception):
+    """No slot became available before the deadline, or the queue is full"""
+
+    def __init__(self, limiter, retry_after):
+        super().__init__(f"{limiter} is at capacity, retry in {retry_after:.0f}s")
+        self.limiter = limiter
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """rate tokens per second up to burst; callers hold the limiter's lock"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def take(self, now):
+        """Take a token and return 0, or return the seconds until one is available"""
+        if self.refill(now) >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _Waiter:
+    __slots__ = ('priority', 'wake', 'granted', 'cancelled', 'enqueued_at')
+
+    def __init__(self, priority, wake):
+        self.priority = priority
+        self.wake = wake
+        self.granted = False
+        self.cancelled = False
+        self.enqueued_at = time.monotonic()
+
+
+class Limiter:
+    """Concurrency cap plus optional rate limit with priority queuing"""
+
+    def __init__(self, name, max_concurrent, rate=0.0, burst=None, max_queue=100):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        self.max_queue = max_queue
+
+        self.in_flight = 0
+        self._queue = []  # (priority, seq, waiter)
+        self._queued = 0  # Live (not cancelled) waiters
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._in_flight_gauge = admission_in_flight.labels(name)
+        self._depth_gauge = admission_queue_depth.labels(name)
+
+    def __repr__(self):
+        return f"Limiter({self.name!r})"
+
+    def saturated(self):
+        """True if a new request would have to queue"""
+        with self._lock:
+            if self._queued or self.in_flight >= self.max_concurrent:
+                return True
+            return self.bucket is not None and self.bucket.refill(time.monotonic()) < 1
+
+    def queued(self):
+        return self._queued
+
+    def retry_after(self):
+        """Rough seconds until the current queue clears, for BUSY replies"""
+        rate = self.bucket.rate if self.bucket is not None else self.max_concurrent
+        return max(1.0, (self._queued + 1) / rate)
+
+    def try_acquire(self, priority=BACKGROUND):
+        """Take a slot only if nothing is queued and one is free right now"""
+        with self._lock:
+            if self._queued or self.in_flight >= self.max_concurrent:
+                return False
+            if self.bucket is not None and self.bucket.take(time.monotonic()):
+                return False
+            self._admit()
+        self._record(priority, 0.0)
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._in_flight_gauge.dec()
+            self._dispatch(time.monotonic())
+
+    def _admit(self):
+        self.in_flight += 1
+        self._in_flight_gauge.inc()
+
+    def _dispatch(self, now):
+        """Admit queued waiters in order; returns seconds until the next token, if waiting on one"""
+        while self._queue and self.in_flight < self.max_concurrent:
+            waiter = self._queue[0][2]
+            if waiter.cancelled:
+                heapq.heappop(self._queue)
+                continue
+            if self.bucket is not None:
+                delay = self.bucket.take(now)
+                if delay:
+                    return delay
+            heapq.heappop(self._queue)
+            self._queued -= 1
+            self._depth_gauge.dec()
+            self._admit()
+            waiter.granted = True
+            waiter.wake()
+        return None
+
+    def _enqueue(self, priority, wake):
+        """Queue a waiter and admit whatever can go now; (waiter, retry_in)"""
+        waiter = _Waiter(priority, wake)
+        with self._lock:
+            if self._queued >= self.max_queue:
+                admission_rejected.labels(self.name).inc()
+                raise Busy(self.name, self.retry_after())
+            heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+            self._queued += 1
+            self._depth_gauge.inc()
+            retry_in = self._dispatch(time.monotonic())
+        return waiter, retry_in
+
+    def _poll(self, waiter, deadline):
+        """Re-run dispatch for a waiting caller; (done, retry_in). Raises Busy past the deadline."""
+        with self._lock:
+            if waiter.granted:
+                return True, None
+            now = time.monotonic()
+            retry_in = self._dispatch(now)
+            if waiter.granted:
+                return True, None
+            if deadline is not None and now >= deadline:
+                waiter.cancelled = True
+                self._queued -= 1
+                self._depth_gauge.dec()
+                admission_rejected.labels(self.name).inc()
+                raise Busy(self.name, self.retry_after())
+        return False, retry_in
+
+    def _abandon(self, waiter):
+        """The caller gave up (e.g. cancelled); hand back a slot granted meanwhile"""
+        with self._lock:
+            if not waiter.granted:
+                waiter.cancelled = True
+                self._queued -= 1
+                self._depth_gauge.dec()
+                return
+        self.release()
+
+    def _record(self, priority, waited):
+        admission_wait.labels(self.name, PRIORITY_NAMES.get(priority, str(priority))).observe(waited)
+
+    @staticmethod
+    def _wait_time(deadline, retry_in):
+        timeouts = [t for t in (retry_in, deadline and deadline - time.monotonic()) if t is not None]
+        return max(0.0, min(timeouts)) if timeouts else None
+
+    def acquire(self, priority=BACKGROUND, timeout=None):
+        """Block the calling thread until admitted; raises Busy after timeout seconds"""
+        event = threading.Event()
+        waiter, retry_in = self._enqueue(priority, event.set)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while not waiter.granted:
+            event.wait(self._wait_time(deadline, retry_in))
+            done, retry_in = self._poll(waiter, deadline)
+            if done:
+                break
+        self._record(priority, time.monotonic() - waiter.enqueued_at)
+
+    async def acquire_async(self, priority=BACKGROUND, timeout=None, on_queued=None):
+        """
+        Wait on the event loop until admitted; raises Busy after timeout
+        seconds. on_queued(position) is awaited once if the request has to wait.
+        """
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+
+        def wake():
+            with contextlib.suppress(RuntimeError):  # Loop already closed
+                loop.call_soon_threadsafe(event.set)
+
+        waiter, retry_in = self._enqueue(priority, wake)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            if not waiter.granted and on_queued is not None:
+                await on_queued(self._queued)
+            while not waiter.granted:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(event.wait(), self._wait_time(deadline, retry_in))
+                done, retry_in = self._poll(waiter, deadline)
+                if done:
+                    break
+        except Busy:
+            raise
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        self._record(priority, time.monotonic() - waiter.enqueued_at)
+
+    @contextlib.contextmanager
+    def slot(self, priority=BACKGROUND, timeout=None):
+        self.acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self.release()
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import gemini_cache_hits, gemini_cache_misses
+
+logger = logging.getLogger("echomind.db")
+
+
+def _log_write_error(future):
+    """Done-callback for cache writes nobody waits on"""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("❌ Analysis cache write failed: %s", future.exception())
+
+
+def make_cache_key(model_name, prompt):
+    """Content address for an LLM request: model name plus full prompt"""
+    digest = hashlib.sha256()
+    digest.update(model_name.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(prompt.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """Two-tier cache for parsed Gemini analyses: in-memory LRU over SQLite"""
+
+    def __init__(self, db, max_entries=256, max_rows=5000, ttl_seconds=7 * 24 * 3600):
+        self.db = db  # SessionDatabase; persistence rides on its connections
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl_seconds = ttl_seconds
+
+        self._entries = OrderedDict()  # key -> (created_at, analysis)
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.init_table()
+
+    def init_table(self):
+        """Create the cache table next to sessions"""
+        self.db.write(self._init_table).result()
+
+    def _init_table(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_used
+            ON analysis_cache (last_used)
+        ''')
+
+    def _is_fresh(self, created_at, now):
+        return now - created_at < self.ttl_seconds
+
+    def _remember(self, key, created_at, analysis):
+        with self._lock:
+            self._entries[key] = (created_at, analysis)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached analysis dict, or None on a miss"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_fresh(entry[0], now):
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    gemini_cache_hits.labels(tier='memory').inc()
+                    return entry[1]
+                del self._entries[key]
+
+        row = self.db.read(self._select, key)
+
+        if row is None or not self._is_fresh(row[1], now):
+            if row is not None:
+                self.db.write(self._delete, key).add_done_callback(_log_write_error)
+            with self._lock:
+                self.misses += 1
+            gemini_cache_misses.inc()
+            return None
+
+        self.db.write(self._touch, key, now).add_done_callback(_log_write_error)
+
+        analysis = json.loads(row[0])
+        self._remember(key, row[1], analysis)
+        with self._lock:
+            self.disk_hits += 1
+        gemini_cache_hits.labels(tier='disk').inc()
+        return analysis
+
+    def put(self, key, model_name, analysis):
+        """Store a parsed analysis in both tiers"""
+        now = time.time()
+        self._remember(key, now, analysis)
+        # Persist without waiting on the writer thread
+        self.db.write(self._insert, key, model_name, json.dumps(analysis), now).add_done_callback(
+            _log_write_error)
+
+    def _select(self, cursor, key):
+        cursor.execute('''
+            SELECT analysis, created_at FROM analysis_cache WHERE cache_key = ?
+        ''', (key,))
+        return cursor.fetchone()
+
+    def _delete(self, cursor, key):
+        cursor.execute('DELETE FROM analysis_cache WHERE cache_key = ?', (key,))
+
+    def _touch(self, cursor, key, now):
+        cursor.execute('''
+            UPDATE analysis_cache SET last_used = ? WHERE cache_key = ?
+        ''', (now, key))
+
+    def _insert(self, cursor, key, model_name, analysis_json, now):
+        cursor.execute('''
+            INSERT OR REPLACE INTO analysis_cache (cache_key, model, analysis, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (key, model_name, analysis_json, now, now))
+
+        # Enforce TTL and the row limit, least recently used first
+        cursor.execute('DELETE FROM analysis_cache WHERE created_at < ?', (now - self.ttl_seconds,))
+        cursor.execute('''
+            DELETE FROM analysis_cache WHERE cache_key IN (
+                SELECT cache_key FROM analysis_cache
+                ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        ''', (self.max_rows,))
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (hits / total) if total else 0.0,
+                "memory_entries": len(self._entries),
+            }
@@ -0,0 +1,324 @@
+"""
+Server-side voice activity gate for the linear16 mic stream.
+
+Incoming chunks are cut into fixed frames without copying (memoryview +
+np.frombuffer), RMS energy and zero-crossing rate are computed for all
+frames of a chunk at once, and only speech plus a little padding is
+forwarded to Deepgram. During silence the upstream connection is kept open
+with KeepAlive messages.
+"""
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # linear16
+
+# Upper bounds (ms) of the pause-length histogram
+PAUSE_BUCKETS_MS = (500, 1000, 2000, 4000)
+
+KEEPALIVE_MESSAGE = json.dumps({"type": "KeepAlive"})
+# Ask Deepgram to emit what it has once a speech run ends
+FINALIZE_MESSAGE = json.dumps({"type": "Finalize"})
+
+
+def frame_features(frames):
+    """Per-frame RMS (int16 units) and zero-crossing rate for an (n, samples) array"""
+    samples = frames.astype(np.float32)
+    rms = np.sqrt(np.mean(samples * samples, axis=1))
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frames.shape[1] - 1)
+    return rms, zcr
+
+
+def _bucket_label(index, buckets):
+    if index == 0:
+        return f"<{buckets[0] / 1000:g}s"
+    if index == len(buckets):
+        return f">={buckets[-1] / 1000:g}s"
+    return f"{buckets[index - 1] / 1000:g}-{buckets[index] / 1000:g}s"
+
+
+class DeliveryAnalyzer:
+    """
+    Streaming delivery statistics from per-frame speech flags and RMS.
+    State is a handful of counters, so memory stays constant for any
+    session length.
+    """
+
+    def __init__(self, frame_ms=20, min_pause_ms=250, long_pause_ms=2000,
+                 pause_buckets_ms=PAUSE_BUCKETS_MS):
+        self.frame_ms = frame_ms
+        self.min_pause_frames = min_pause_ms // frame_ms
+        self.long_pause_frames = long_pause_ms // frame_ms
+        self.pause_buckets_ms = tuple(pause_buckets_ms)
+        self._bucket_frames = np.array(pause_buckets_ms) // frame_ms
+
+        self.speech_frames = 0
+        self.silence_frames = 0
+        self.pause_histogram = np.zeros(len(pause_buckets_ms) + 1, dtype=np.int64)
+        self.pause_frames = 0
+        self.long_pauses = 0
+        self._silence_run = 0  # Trailing silence not yet closed by speech
+        self._seen_speech = False
+
+        # Loudness of speech frames in dBFS (Chan/Welford running moments)
+        self._loud_n = 0
+        self._loud_mean = 0.0
+        self._loud_m2 = 0.0
+
+    @property
+    def speech_seconds(self):
+        return self.speech_frames * self.frame_ms / 1000
+
+    @property
+    def silence_seconds(self):
+        return self.silence_frames * self.frame_ms / 1000
+
+    def observe(self, rms, speech):
+        """Fold one chunk's per-frame RMS and speech flags into the totals"""
+        spoken = np.flatnonzero(speech)
+        self.speech_frames += spoken.size
+        self.silence_frames += speech.size - spoken.size
+
+        if spoken.size == 0:
+            self._silence_run += speech.size
+            return
+
+        # Silence runs closed by speech in this chunk; leading silence isn't a pause
+        runs = np.diff(spoken) - 1
+        if self._seen_speech:
+            runs = np.append(runs, spoken[0] + self._silence_run)
+        self._record_pauses(runs[runs >= self.min_pause_frames])
+        self._silence_run = speech.size - 1 - int(spoken[-1])
+        self._seen_speech = True
+
+        self._record_loudness(rms[spoken])
+
+    def _record_pauses(self, runs):
+        if not runs.size:
+            return
+        buckets = np.searchsorted(self._bucket_frames, runs, side='right')
+        self.pause_histogram += np.bincount(buckets, minlength=self.pause_histogram.size)
+        self.pause_frames += int(runs.sum())
+        self.long_pauses += int(np.count_nonzero(runs >= self.long_pause_frames))
+
+    def _record_loudness(self, rms):
+        db = 20 * np.log10(np.maximum(rms, 1.0) / 32768.0)
+        n = db.size
+        mean = float(db.mean())
+        m2 = float(((db - mean) ** 2).sum())
+        total = self._loud_n + n
+        delta = mean - self._loud_mean
+        self._loud_mean += delta * n / total
+        self._loud_m2 += m2 + delta * delta * self._loud_n * n / total
+        self._loud_n = total
+
+    def snapshot(self):
+        """Running totals as plain JSON-able values, for resuming a session"""
+        return {
+            "speech_frames": self.speech_frames,
+            "silence_frames": self.silence_frames,
+            "pause_histogram": self.pause_histogram.tolist(),
+            "pause_frames": self.pause_frames,
+            "long_pauses": self.long_pauses,
+            "silence_run": self._silence_run,
+            "seen_speech": self._seen_speech,
+            "loudness": [self._loud_n, self._loud_mean, self._loud_m2],
+        }
+
+    def restore(self, snapshot):
+        self.speech_frames = snapshot["speech_frames"]
+        self.silence_frames = snapshot["silence_frames"]
+        self.pause_histogram = np.array(snapshot["pause_histogram"], dtype=np.int64)
+        self.pause_frames = snapshot["pause_frames"]
+        self.long_pauses = snapshot["long_pauses"]
+        self._silence_run = snapshot["silence_run"]
+        self._seen_speech = snapshot["seen_speech"]
+        self._loud_n, self._loud_mean, self._loud_m2 = snapshot["loudness"]
+
+    def summary(self):
+        pause_count = int(self.pause_histogram.sum())
+        return {
+            "speaking_seconds": round(self.speech_seconds, 1),
+            "silence_seconds": round(self.silence_seconds, 1),
+            "pause_count": pause_count,
+            "long_pause_count": self.long_pauses,
+            "avg_pause_seconds": round(self.pause_frames * self.frame_ms / 1000 / pause_count, 2) if pause_count else 0.0,
+            "pause_histogram": {
+                _bucket_label(i, self.pause_buckets_ms): int(count)
+                for i, count in enumerate(self.pause_histogram)
+            },
+            "loudness_mean_db": round(self._loud_mean, 1) if self._loud_n else None,
+            "loudness_std_db": round((self._loud_m2 / self._loud_n) ** 0.5, 1) if self._loud_n > 1 else None,
+        }
+
+
+class VoiceActivityGate:
+    """
+    Forward speech frames plus pre-roll and hangover padding; drop the rest.
+
+    A frame counts as speech when its energy clears an adaptive threshold
+    (a multiple of the tracked noise floor, never below min_rms) and its
+    zero-crossing rate is below max_zcr, which screens out hiss and clicks.
+    Per-frame results also feed an optional DeliveryAnalyzer; with
+    passthrough=True every chunk is forwarded and only the analysis runs.
+    """
+
+    def __init__(self, send, sample_rate=SAMPLE_RATE, frame_ms=20, min_rms=300.0,
+                 snr=3.0, max_zcr=0.35, hangover_ms=300, preroll_ms=200,
+                 keepalive_interval=5.0, finalize_on_silence=True,
+                 analyzer=None, passthrough=False):
+        self.send = send
+        self.analyzer = analyzer
+        self.passthrough = passthrough
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_samples * SAMPLE_WIDTH
+        self.frame_ms = frame_ms
+        self.min_rms = min_rms
+        self.snr = snr
+        self.max_zcr = max_zcr
+        self.hangover_frames = max(0, hangover_ms // frame_ms)
+        self.keepalive_interval = keepalive_interval
+        self.finalize_on_silence = finalize_on_silence
+
+        self.noise_floor = min_rms / snr
+        self._pending = b''  # Partial frame carried to the next chunk
+        self._preroll = deque(maxlen=max(0, preroll_ms // frame_ms))
+        self._hangover = 0
+        self._in_speech = False
+        self._last_sent = time.monotonic()
+
+        self.bytes_received = 0
+        self.bytes_forwarded = 0
+        self.speech_frames = 0
+        self.silence_frames = 0
+        self.keepalives_sent = 0
+
+    def threshold(self):
+        return max(self.min_rms, self.noise_floor * self.snr)
+
+    def classify(self, frames):
+        """Speech flags and RMS for an (n, samples) int16 array; updates the noise floor"""
+        rms, zcr = frame_features(frames)
+        loud = rms >= self.threshold()
+        speech = loud & (zcr <= self.max_zcr)
+        quiet = rms[~loud]  # Hiss is rejected by ZCR, not folded into the floor
+        if quiet.size:
+            # Slow EMA toward this chunk's quiet level
+            self.noise_floor += 0.1 * (float(np.median(quiet)) - self.noise_floor)
+        return speech, rms
+
+    def process(self, chunk):
+        """Gate one chunk of mic audio; returns the number of bytes forwarded"""
+        self.bytes_received += len(chunk)
+        forwarded = self._forward(chunk) if self.passthrough else 0
+
+        if self._pending:
+            data = memoryview(self._pending + chunk)
+        else:
+            data = memoryview(chunk)
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = bytes(data[usable:])
+        if not usable:
+            return forwarded
+
+        frames = np.frombuffer(data[:usable], dtype='<i2').reshape(-1, self.frame_samples)
+        speech, rms = self.classify(frames)
+        if self.analyzer is not None:
+            self.analyzer.observe(rms, speech)
+        if self.passthrough:
+            self.speech_frames += int(np.count_nonzero(speech))
+            self.silence_frames += speech.size - int(np.count_nonzero(speech))
+            return forwarded
+
+        run_start = None
+        for index, is_speech in enumerate(speech.tolist()):
+            if is_speech:
+                self.speech_frames += 1
+                self._hangover = self.hangover_frames
+                if not self._in_speech:
+                    self._in_speech = True
+                    forwarded += self._send_preroll()
+                keep = True
+            else:
+                self.silence_frames += 1
+                keep = self._hangover > 0
+                self._hangover -= keep
+
+            if keep:
+                if run_start is None:
+                    run_start = index
+                continue
+
+            if run_start is not None:
+                forwarded += self._forward(data[run_start * self.frame_bytes:index * self.frame_bytes])
+                run_start = None
+            if self._in_speech:
+                self._in_speech = False
+                if self.finalize_on_silence:
+                    self.send(FINALIZE_MESSAGE)
+            self._preroll.append(data[index * self.frame_bytes:(index + 1) * self.frame_bytes])
+
+        if run_start is not None:
+            forwarded += self._forward(data[run_start * self.frame_bytes:usable])
+
+        self._keepalive_if_idle()
+        return forwarded
+
+    def flush(self):
+        """Forward the trailing partial frame if speech is still open"""
+        forwarded = 0
+        if self._pending and self._in_speech and not self.passthrough:
+            forwarded = self._forward(self._pending)
+        self._pending = b''
+        return forwarded
+
+    def _forward(self, data):
+        self.send(data)
+        self.bytes_forwarded += len(data)
+        self._last_sent = time.monotonic()
+        return len(data)
+
+    def _send_preroll(self):
+        if not self._preroll:
+            return 0
+        data = b''.join(self._preroll)
+        self._preroll.clear()
+        return self._forward(data)
+
+    def _keepalive_if_idle(self):
+        now = time.monotonic()
+        if now - self._last_sent >= self.keepalive_interval:
+            self.send(KEEPALIVE_MESSAGE)
+            self.keepalives_sent += 1
+            self._last_sent = now
+
+    def snapshot(self):
+        """Counters and noise floor; framing state starts fresh on resume"""
+        return {
+            "noise_floor": self.noise_floor,
+            "bytes_received": self.bytes_received,
+            "bytes_forwarded": self.bytes_forwarded,
+            "speech_frames": self.speech_frames,
+            "silence_frames": self.silence_frames,
+            "keepalives_sent": self.keepalives_sent,
+        }
+
+    def restore(self, snapshot):
+        for name, value in snapshot.items():
+            setattr(self, name, value)
+
+    def stats(self):
+        saved = self.bytes_received - self.bytes_forwarded
+        return {
+            "bytes_received": self.bytes_received,
+            "bytes_forwarded": self.bytes_forwarded,
+            "bytes_saved": saved,
+            "saved_ratio": round(saved / self.bytes_received, 3) if self.bytes_received else 0.0,
+            "speech_seconds": round(self.speech_frames * self.frame_ms / 1000, 1),
+            "silence_seconds": round(self.silence_frames * self.frame_ms / 1000, 1),
+            "keepalives_sent": self.keepalives_sent,
+        }
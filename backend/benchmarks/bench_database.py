@@ -0,0 +1,130 @@
+"""
+Create/end session throughput: connection-per-call vs pooled WAL writer
+
+    python benchmarks/bench_database.py [sessions]
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionDatabase
+
+SUMMARY = {
+    "duration_seconds": 300,
+    "total_words": 650,
+    "total_sentences": 48,
+    "filler_count": 12,
+    "filler_details": {"um": 5, "like": 4, "you know": 3},
+    "avg_wpm": 130.0,
+    "confidence_score": 34,
+    "strengths": ["Perfect pacing"],
+    "improvements": ["Reduce 'um' usage"],
+    "full_transcript": "I led the migration and reduced latency by forty percent. " * 60,
+}
+
+
+class ConnectionPerCallDatabase:
+    """The original access pattern: open, execute, commit, close"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        # The original schema and default (rollback journal) mode, not SessionDatabase's WAL setup
+        conn = sqlite3.connect(db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT UNIQUE NOT NULL,
+                start_time TIMESTAMP NOT NULL,
+                end_time TIMESTAMP,
+                duration_seconds INTEGER,
+                total_words INTEGER DEFAULT 0,
+                total_sentences INTEGER DEFAULT 0,
+                filler_count INTEGER DEFAULT 0,
+                filler_details TEXT,
+                avg_wpm REAL DEFAULT 0,
+                confidence_score INTEGER DEFAULT 0,
+                strengths TEXT,
+                improvements TEXT,
+                full_transcript TEXT,
+                status TEXT DEFAULT 'active'
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def create_session(self, session_id):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            INSERT INTO sessions (session_id, start_time, status) VALUES (?, ?, 'active')
+        ''', (session_id, datetime.now()))
+        conn.commit()
+        conn.close()
+
+    def end_session(self, session_id, data):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            UPDATE sessions SET end_time = ?, duration_seconds = ?, total_words = ?,
+                total_sentences = ?, filler_count = ?, filler_details = ?, avg_wpm = ?,
+                confidence_score = ?, strengths = ?, improvements = ?, full_transcript = ?,
+                status = 'completed'
+            WHERE session_id = ?
+        ''', (datetime.now(), data['duration_seconds'], data['total_words'],
+              data['total_sentences'], data['filler_count'], json.dumps(data['filler_details']),
+              data['avg_wpm'], data['confidence_score'], json.dumps(data['strengths']),
+              json.dumps(data['improvements']), data['full_transcript'], session_id))
+        conn.commit()
+        conn.close()
+
+
+def bench_sequential(db, sessions):
+    start = time.perf_counter()
+    for _ in range(sessions):
+        session_id = str(uuid.uuid4())
+        db.create_session(session_id)
+        db.end_session(session_id, SUMMARY)
+    return sessions / (time.perf_counter() - start)
+
+
+async def bench_concurrent(db, sessions):
+    async def one():
+        session_id = str(uuid.uuid4())
+        await db.create_session_async(session_id)
+        await db.end_session_async(session_id, SUMMARY)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(sessions)))
+    return sessions / (time.perf_counter() - start)
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    # Keep the benchmark output readable
+    logging.getLogger("echomind").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = ConnectionPerCallDatabase(os.path.join(tmp, 'legacy.db'))
+        legacy_rate = bench_sequential(legacy, sessions)
+
+        pooled = SessionDatabase(os.path.join(tmp, 'pooled.db'))
+        pooled_rate = bench_sequential(pooled, sessions)
+        concurrent_rate = asyncio.run(bench_concurrent(pooled, sessions))
+        pooled.close()
+
+    print(f"sessions per run:                 {sessions}")
+    print(f"connection-per-call (sequential): {legacy_rate:8.0f} sessions/s")
+    print(f"pooled WAL writer (sequential):   {pooled_rate:8.0f} sessions/s")
+    print(f"pooled WAL writer (concurrent):   {concurrent_rate:8.0f} sessions/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Session history queries against a large synthetic database
+
+    python benchmarks/bench_history.py [rows]
+"""
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionDatabase
+
+
+def insert_rows(cursor, rows):
+    start = datetime(2024, 1, 1)
+    batch = []
+    for i in range(rows):
+        begin = start + timedelta(seconds=i * 60 + random.randint(0, 59))
+        words = random.randint(100, 1500)
+        batch.append((
+            f"synthetic-{i}", str(begin), str(begin + timedelta(minutes=5)), 300, words,
+            words // 12, random.randint(0, 40), random.uniform(90, 190),
+            random.randint(20, 70), "I led the project. " * 10,
+        ))
+        if len(batch) == 10000:
+            flush(cursor, batch)
+            batch = []
+    flush(cursor, batch)
+
+
+def flush(cursor, batch):
+    cursor.executemany('''
+        INSERT INTO sessions (session_id, start_time, end_time, duration_seconds, total_words,
+            total_sentences, filler_count, avg_wpm, confidence_score, full_transcript, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'completed')
+    ''', batch)
+
+
+def timed(label, fn, repeat=20):
+    fn()  # Warm the page cache
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    print(f"{label:<44} {elapsed:9.2f} ms")
+    return result
+
+
+def full_scan_trends(db):
+    def query(cursor):
+        cursor.execute('''
+            SELECT date(start_time, 'weekday 0', '-6 days') AS week, COUNT(*), AVG(avg_wpm),
+                   SUM(filler_count) * 100.0 / SUM(total_words), AVG(confidence_score)
+            FROM sessions WHERE status = 'completed'
+            GROUP BY week ORDER BY week DESC LIMIT 12
+        ''')
+        return cursor.fetchall()
+    return db.read(query)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    # Keep the benchmark output readable
+    logging.getLogger("echomind").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SessionDatabase(os.path.join(tmp, 'history.db'))
+        start = time.perf_counter()
+        db.write(insert_rows, rows).result()
+        db.rebuild_rollups()
+        print(f"Loaded {rows} sessions in {time.perf_counter() - start:.1f}s\n")
+
+        page = timed("list_sessions first page (20)", lambda: db.list_sessions(20))
+        cursor = page["next_cursor"]
+        for _ in range(500):
+            cursor = db.list_sessions(20, cursor)["next_cursor"]
+        timed("list_sessions page 500 via keyset cursor", lambda: db.list_sessions(20, cursor))
+        timed("get_session detail", lambda: db.get_session(f"synthetic-{rows // 2}"))
+        timed("get_trends week (rollup table)", lambda: db.get_trends('week', 12))
+        timed("get_trends day (rollup table)", lambda: db.get_trends('day', 30))
+        timed("weekly trends via full scan (old approach)", lambda: full_scan_trends(db), repeat=3)
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
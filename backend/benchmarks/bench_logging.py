@@ -0,0 +1,112 @@
+"""
+Per-sentence logging overhead under many concurrent sessions: the old
+synchronous print() lines vs queued, sampled structured logging
+
+    python benchmarks/bench_logging.py [sessions] [sentences_per_session]
+"""
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TMP = tempfile.mkdtemp()
+os.environ.setdefault("ECHOMIND_DB_PATH", os.path.join(TMP, "bench.db"))
+os.environ.setdefault("ECHOMIND_LLM", "fake")
+os.environ.setdefault("ECHOMIND_LOG_LEVEL", "WARNING")
+LOG_PATH = os.path.join(TMP, "echomind.log")
+
+import logging_setup  # noqa: E402
+
+# Line-buffered like stdout under PYTHONUNBUFFERED / a container log driver
+logging_setup.setup_logging(stream=open(LOG_PATH, "a", buffering=1, encoding="utf-8"))
+
+from fake_backends import SAMPLE_TRANSCRIPT  # noqa: E402
+from main import SessionCoach  # noqa: E402
+
+
+class PrintingCoach(SessionCoach):
+    """SessionCoach with the original print() lines on the callback thread"""
+
+    def analyze_transcript(self, text):
+        feedback = super().analyze_transcript(text)
+        print(f"📝 Sentence {self.state.sentence_count}: {text}")
+        if feedback:
+            print(f"\n🔍 CHECKPOINT - Analyzing last {4} sentences...")
+            state = self.state
+            print(f"   Words: {state.word_count} | Fillers: {state.filler_total} "
+                  f"{list(state.filler_counter)} | WPM: {state.avg_wpm(60):.0f} | Power: 0")
+            print(f"💬 Feedback: [{feedback['type']}] {feedback['message']}\n")
+        return feedback
+
+
+def run(coach_class, sessions, sentences):
+    """One thread per session, like one Deepgram listener thread per connection"""
+    barrier = threading.Barrier(sessions + 1)
+    busy = [0.0] * sessions
+
+    def session(index):
+        coach = coach_class(f"bench-{index}")
+        barrier.wait()
+        for i in range(sentences):
+            text = SAMPLE_TRANSCRIPT[i % len(SAMPLE_TRANSCRIPT)]
+            started = time.thread_time()  # CPU on this thread, not GIL waits
+            coach.analyze_transcript(text)
+            busy[index] += time.thread_time() - started
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    return wall, sum(busy) / (sessions * sentences)
+
+
+def report(label, wall, per_sentence, total):
+    print(f"{label:<44} {per_sentence * 1e6:8.1f} µs CPU/sentence  {total / wall:10.0f} sentences/s")
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    sentences = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    total = sessions * sentences
+    echomind = logging.getLogger("echomind")
+    sampler = logging_setup.live_log.sampler
+
+    print(f"{sessions} concurrent sessions x {sentences} sentences\n")
+
+    echomind.setLevel(logging.WARNING)
+    wall, per = run(SessionCoach, sessions, sentences)
+    report("no logging (analysis only)", wall, per, total)
+
+    with open(os.path.join(TMP, "stdout.log"), "w", buffering=1, encoding="utf-8") as out:
+        with contextlib.redirect_stdout(out):
+            wall, per = run(PrintingCoach, sessions, sentences)
+    report("print() to stdout (before)", wall, per, total)
+
+    echomind.setLevel(logging.INFO)
+    sampler.sample_every, sampler.max_per_second = 10, 50
+    wall, per = run(SessionCoach, sessions, sentences)
+    report("logging INFO, sentences disabled, sampled", wall, per, total)
+
+    echomind.setLevel(logging.DEBUG)
+    wall, per = run(SessionCoach, sessions, sentences)
+    report("logging DEBUG, sampled 1/10, <=50/s", wall, per, total)
+
+    sampler.sample_every, sampler.max_per_second = 1, 0
+    wall, per = run(SessionCoach, sessions, sentences)
+    report("logging DEBUG, every event (JSON via queue)", wall, per, total)
+
+    logging_setup.shutdown_logging()
+    print(f"\nLog output: {LOG_PATH}")
+
+
+if __name__ == "__main__":
+    main()
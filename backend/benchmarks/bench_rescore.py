@@ -0,0 +1,68 @@
+"""
+Re-scoring throughput on a large synthetic history, one scoring process vs
+one per CPU. Sessions keep their transcripts in segments, as live sessions do.
+
+    python benchmarks/bench_rescore.py [sessions] [sentences_per_session]
+"""
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionDatabase  # noqa: E402
+from fake_backends import load_transcript  # noqa: E402
+from rescore import rescore  # noqa: E402
+
+
+def insert_sessions(cursor, sessions, sentences_per_session):
+    sample = load_transcript()
+    start = datetime(2024, 1, 1)
+    for i in range(sessions):
+        begin = start + timedelta(minutes=i)
+        sentences = random.choices(sample, k=sentences_per_session)
+        words = sum(len(s.split()) for s in sentences)
+        cursor.execute('''
+            INSERT INTO sessions (session_id, start_time, end_time, duration_seconds, total_words,
+                total_sentences, filler_count, avg_wpm, articulation_wpm, confidence_score, status)
+            VALUES (?, ?, ?, 300, ?, ?, 0, ?, ?, 50, 'completed')
+        ''', (f"synthetic-{i}", str(begin), str(begin + timedelta(minutes=5)), words,
+              len(sentences), words / 5, random.uniform(110, 190)))
+        cursor.executemany('''
+            INSERT INTO segments (session_id, seq, timestamp, text) VALUES (?, ?, 0, ?)
+        ''', [(f"synthetic-{i}", seq, text) for seq, text in enumerate(sentences)])
+
+
+def reset(cursor):
+    cursor.execute("UPDATE sessions SET rules_version = NULL")
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    sentences = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    logging.getLogger("echomind").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SessionDatabase(os.path.join(tmp, 'rescore.db'))
+        started = time.perf_counter()
+        db.write(insert_sessions, sessions, sentences).result()
+        db.rebuild_rollups()
+        print(f"Loaded {sessions} sessions x {sentences} sentences in {time.perf_counter() - started:.1f}s\n")
+
+        for processes in sorted({1, os.cpu_count() or 1}):
+            db.write(reset).result()
+            started = time.perf_counter()
+            updated = rescore(db, processes=processes)
+            elapsed = time.perf_counter() - started
+            print(f"{processes:>2} process(es)  {updated} sessions in {elapsed:6.1f}s"
+                  f"   {updated / elapsed:8.0f} sessions/s")
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Full-text transcript search on a large synthetic corpus
+
+    python benchmarks/bench_search.py [sessions] [segments_per_session]
+"""
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionDatabase
+
+COMMON = (
+    "i we the team project system data customer led built designed improved latency "
+    "pipeline kubernetes migration database api service feature release deadline metric "
+    "um like you know basically actually so stakeholder roadmap testing deployment "
+    "architecture scaling queue cache python react mobile analytics revenue growth"
+).split()
+# Zipf-distributed vocabulary: a few very common words and a long tail
+VOCABULARY = COMMON + [f"word{i}" for i in range(5000)]
+CUM_WEIGHTS = []
+for rank in range(1, len(VOCABULARY) + 1):
+    CUM_WEIGHTS.append((CUM_WEIGHTS[-1] if CUM_WEIGHTS else 0) + 1 / rank)
+RARE = "zephyrine"
+
+
+def sentence(rng):
+    words = rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=rng.randint(8, 20))
+    return ' '.join(words).capitalize() + '.'
+
+
+def insert_corpus(cursor, sessions, segments_per_session):
+    rng = random.Random(7)
+    now = time.time()
+    for s in range(sessions):
+        session_id = f"synthetic-{s}"
+        cursor.execute('''
+            INSERT INTO sessions (session_id, start_time, status) VALUES (?, datetime('now'), 'completed')
+        ''', (session_id,))
+        rows = []
+        for seq in range(segments_per_session):
+            text = sentence(rng)
+            if rng.random() < 0.0005:
+                text += f" {RARE} release."
+            rows.append((session_id, seq, now, text, len(text.split()), 0))
+        cursor.executemany('''
+            INSERT INTO segments (session_id, seq, timestamp, text, word_count, filler_count)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+
+def timed(label, fn, repeat=20):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    print(f"{label:<46} {elapsed:9.2f} ms  ({len(result['results'])} results)")
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    segments = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    # Keep the benchmark output readable
+    logging.getLogger("echomind").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SessionDatabase(os.path.join(tmp, 'search.db'))
+        if not db.search_enabled:
+            print("FTS5 is not available in this SQLite build")
+            return
+
+        start = time.perf_counter()
+        db.write(insert_corpus, sessions, segments).result()
+        elapsed = time.perf_counter() - start
+        print(f"Indexed {sessions * segments} segments ({sessions} sessions) "
+              f"via triggers in {elapsed:.1f}s\n")
+        db.write(lambda c: c.execute(
+            "INSERT INTO transcript_fts (transcript_fts) VALUES ('optimize')")).result()
+
+        timed("very common term: 'team'", lambda: db.search_transcripts("team"))
+        timed("mid-frequency term: 'kubernetes'", lambda: db.search_transcripts("kubernetes"))
+        timed("two terms: 'latency migration'", lambda: db.search_transcripts("latency migration"))
+        timed("phrase: '\"you know\"'", lambda: db.search_transcripts('"you know"'))
+        timed("long-tail term: 'word1234'", lambda: db.search_transcripts("word1234"))
+        timed(f"rare term: '{RARE}'", lambda: db.search_transcripts(RARE))
+        timed("deep page: 'kubernetes' offset 1000",
+              lambda: db.search_transcripts("kubernetes", offset=1000))
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
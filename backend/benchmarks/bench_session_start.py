@@ -0,0 +1,64 @@
+"""
+Upstream stream acquisition at START_SESSION: a cold connect per session vs
+the pre-warmed pool, against the local Deepgram stand-in with a simulated
+TLS/auth handshake
+
+    python benchmarks/bench_session_start.py [sessions] [handshake_ms]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deepgram import DeepgramClient, DeepgramClientOptions, LiveOptions  # noqa: E402
+
+from admission import Limiter  # noqa: E402
+from fake_backends import FakeDeepgramServer  # noqa: E402
+from transcription import TranscriptionManager  # noqa: E402
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(server, pool_size, sessions):
+    deepgram = DeepgramClient("local", DeepgramClientOptions(url=server.url))
+    manager = TranscriptionManager(lambda: deepgram.listen.live.v("1"),
+                                   LiveOptions(encoding="linear16", sample_rate=16000),
+                                   Limiter("deepgram", max_concurrent=50), pool_size=pool_size)
+    await manager.start()
+    await asyncio.sleep(0.5 + pool_size * server.handshake_delay)  # Let the pool fill
+
+    latencies = []
+    for _ in range(sessions):
+        started = time.perf_counter()
+        stream = await manager.acquire(lambda result: None)
+        latencies.append(time.perf_counter() - started)
+        stream.send(b'\0' * 3200)
+        await manager.release(stream)
+        # Sessions arrive spaced out, as in practice; the pool refills in between
+        await asyncio.sleep(server.handshake_delay * 2)
+
+    await manager.stop()
+    return latencies
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    handshake = (float(sys.argv[2]) if len(sys.argv) > 2 else 150) / 1000
+    server = FakeDeepgramServer(handshake_delay=handshake).start()
+
+    print(f"{sessions} sequential session starts, {handshake * 1000:.0f} ms handshake\n")
+    for label, pool_size in (("cold connect per session (before)", 0), ("pre-warmed pool of 2", 2)):
+        latencies = asyncio.run(run(server, pool_size, sessions))
+        print(f"{label:<36} p50 {percentile(latencies, 0.5) * 1000:7.1f} ms"
+              f"   p99 {percentile(latencies, 0.99) * 1000:7.1f} ms")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Cold start: how long `import main` takes, and for a fresh server process the
+time until /health/live answers, until /health/ready reports every required
+dependency up, and until a first START_SESSION gets SESSION_STARTED. Runs on
+the fake transcriber; the Gemini client is the real one (constructing it
+makes no network calls) unless --fake-llm is given.
+
+    python benchmarks/bench_startup.py [--runs 5] [--fake-llm]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import websockets
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def server_env(args, db_path):
+    env = dict(os.environ)
+    env.update({
+        "ECHOMIND_TRANSCRIBER": "fake",
+        "ECHOMIND_DB_PATH": db_path,
+        "ECHOMIND_LOG_LEVEL": "WARNING",
+        "GEMINI_API_KEY": env.get("GEMINI_API_KEY", "unused"),
+    })
+    if args.fake_llm:
+        env["ECHOMIND_LLM"] = "fake"
+    return env
+
+
+def import_seconds(statement, env):
+    """Wall time of a fresh interpreter running statement, minus a bare interpreter"""
+    def timed(code):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=BACKEND_DIR, env=env, check=True)
+        return time.perf_counter() - started
+    return timed(statement) - timed("pass")
+
+
+def poll(url, until):
+    """Poll url until until(status) holds"""
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except OSError:
+            status = None
+        if until(status):
+            return
+        time.sleep(0.005)
+
+
+async def first_session(url):
+    async with websockets.connect(url) as ws:
+        await ws.send(json.dumps({"type": "START_SESSION"}))
+        while json.loads(await ws.recv())["type"] != "SESSION_STARTED":
+            pass
+        await ws.send(json.dumps({"type": "END_SESSION"}))
+
+
+def cold_start(args, env):
+    """(live, ready, first session) seconds after spawning the server"""
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", "uvicorn", "main:app", "--port", str(args.port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        poll(f"{base}/health/live", lambda status: status == 200)
+        live = time.perf_counter() - started
+        poll(f"{base}/health/ready", lambda status: status == 200)
+        ready = time.perf_counter() - started
+        asyncio.run(first_session(f"ws://127.0.0.1:{args.port}/ws"))
+        session = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return live, ready, session
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--fake-llm", action="store_true", help="Skip importing the Gemini SDK")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = server_env(args, os.path.join(tmp, 'startup.db'))
+
+        print(f"Import time (median of {args.runs}, interpreter start excluded)")
+        for label, statement in (
+            ("import main", "import main"),
+            ("  deepgram SDK (deferred)", "import deepgram"),
+            ("  google.generativeai (deferred)", "import google.generativeai"),
+        ):
+            seconds = statistics.median(import_seconds(statement, env) for _ in range(args.runs))
+            print(f"  {label:<34} {seconds * 1000:7.0f} ms")
+
+        runs = [cold_start(args, env) for _ in range(args.runs)]
+        print(f"\nCold start (median of {args.runs})")
+        for index, label in enumerate(("/health/live answers", "/health/ready is 200", "first SESSION_STARTED")):
+            print(f"  {label:<34} {statistics.median(run[index] for run in runs) * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Session capacity as uvicorn workers are added: for each worker count, start
+the backend on the fake upstreams and double the number of concurrent
+sessions until p99 feedback latency breaks the budget. Uses loadtest.py's
+client, which runs in this one process; on small machines the client can
+become the bottleneck before the server does.
+
+    python benchmarks/bench_workers.py [--workers 1,2,4] [--start 25] [--speed 4]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import loadtest
+
+
+def capacity(args, workers, frame):
+    """Largest doubling level that stays within the latency budget"""
+    args.workers = workers
+    with tempfile.TemporaryDirectory() as tmp:
+        server = loadtest.start_server(args, os.path.join(tmp, 'workers.db'))
+        time.sleep(1.0 + workers * 0.5)  # The first worker answering doesn't mean all are up
+        url = f"ws://127.0.0.1:{args.port}/ws"
+        best = 0
+        try:
+            sessions = args.start
+            while sessions <= args.max_sessions:
+                cpu_before = loadtest.cpu_seconds(server.pid)
+                started = time.perf_counter()
+                results = asyncio.run(loadtest.run_level(url, sessions, args, frame))
+                wall = time.perf_counter() - started
+                cpu_after = loadtest.cpu_seconds(server.pid)
+                cpu = cpu_after - cpu_before if None not in (cpu_before, cpu_after) else None
+                if not loadtest.report_level(sessions, results, cpu, wall, args.threshold_ms):
+                    break
+                best = sessions
+                sessions *= 2
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--start", type=int, default=25, help="First concurrency level")
+    parser.add_argument("--max-sessions", type=int, default=800)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--sentences", type=int, default=8)
+    parser.add_argument("--seconds-per-sentence", type=float, default=3.0)
+    parser.add_argument("--speed", type=float, default=4.0)
+    parser.add_argument("--threshold-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    # Fixed loadtest.py settings for every run
+    args.pause_seconds = 0.0
+    args.stt_latency = 0.15
+    args.llm_latency = 0.5
+    args.transcript = None
+    args.wait_ai = False
+    args.interim = False
+
+    frame = loadtest.speech_like_frame()
+    results = []
+    for workers in (int(w) for w in args.workers.split(',')):
+        print(f"\n##### {workers} worker(s) #####")
+        results.append((workers, capacity(args, workers, frame)))
+
+    print(f"\n{'workers':>7}  {'sessions':>8}  {'vs 1 worker':>11}   ({os.cpu_count()} CPUs)")
+    baseline = results[0][1] or 1
+    for workers, sessions in results:
+        print(f"{workers:>7}  {sessions:>8}  {sessions / baseline:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Offline load test for the /ws endpoint.
+
+Starts the backend with the fake Deepgram and Gemini backends (see
+fake_backends.py), then opens N concurrent WebSocket clients that each run a
+full session: START, streamed PCM frames, PAUSE/RESUME, END. Reports feedback
+latency, END_SESSION latency, server CPU per session and the largest level
+whose p99 feedback latency stays under the threshold.
+
+    python benchmarks/loadtest.py --levels 10,50,100 --speed 4
+    python benchmarks/loadtest.py --levels 50,100,200 --workers 4
+    python benchmarks/loadtest.py --url ws://localhost:8000/ws --levels 20
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from array import array
+
+import websockets
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BYTES_PER_SECOND = 32000
+FRAME_SECONDS = 0.1
+
+
+def speech_like_frame():
+    """100 ms of a voiced-sounding tone so energy-based gating treats it as speech"""
+    samples = int(16000 * FRAME_SECONDS)
+    pcm = array('h', (int(4000 * math.sin(2 * math.pi * 180 * i / 16000)
+                          + 1500 * math.sin(2 * math.pi * 950 * i / 16000))
+                      for i in range(samples)))
+    return pcm.tobytes()
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def process_tree(pid):
+    """pid and its live descendants (Linux /proc), e.g. uvicorn's worker processes"""
+    pids = [pid]
+    for parent in pids:
+        try:
+            for task in os.listdir(f"/proc/{parent}/task"):
+                with open(f"/proc/{parent}/task/{task}/children") as f:
+                    pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def cpu_seconds(pid):
+    """User + system CPU time of a process and its workers (Linux /proc)"""
+    total = 0
+    try:
+        for member in process_tree(pid):
+            with open(f"/proc/{member}/stat") as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            total += int(fields[11]) + int(fields[12])
+    except (OSError, IndexError, ValueError):
+        return None
+    return total / os.sysconf('SC_CLK_TCK')
+
+
+class SessionResult:
+    def __init__(self):
+        self.feedback_latencies = []
+        self.end_latency = None
+        self.ai_latency = None
+        self.error = None
+
+
+async def run_session(url, args, frame):
+    result = SessionResult()
+    frames_per_sentence = int(round(args.seconds_per_sentence / FRAME_SECONDS))
+    total_frames = args.sentences * frames_per_sentence
+    frames_per_interim = int(round(1.0 / FRAME_SECONDS)) if args.interim else 0
+    # Pause mid-sentence: transcripts that land while paused are dropped by design
+    pause_at = total_frames // 2 + frames_per_sentence // 2 if args.pause_seconds > 0 else -1
+
+    # When the audio completing each fake transcript result was sent
+    emitted_at = []
+    received = asyncio.Queue()
+
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            async def receiver():
+                async for raw in ws:
+                    await received.put((time.perf_counter(), json.loads(raw)))
+
+            receiver_task = asyncio.create_task(receiver())
+
+            def record(arrived, message):
+                # FEEDBACK answers the latest result the fake could have emitted
+                if message.get("type") != "FEEDBACK":
+                    return
+                ready = arrived - args.stt_latency
+                candidates = [sent for sent in emitted_at if sent <= ready]
+                if candidates:
+                    result.feedback_latencies.append(ready - candidates[-1])
+
+            async def wait_for(message_type, timeout):
+                deadline = time.perf_counter() + timeout
+                while True:
+                    arrived, message = await asyncio.wait_for(
+                        received.get(), max(0.01, deadline - time.perf_counter())
+                    )
+                    record(arrived, message)
+                    if message.get("type") == message_type:
+                        return arrived, message
+
+            await ws.send(json.dumps({"type": "START_SESSION"}))
+            await wait_for("SESSION_STARTED", 30)
+
+            for i in range(total_frames):
+                if i == pause_at:
+                    await ws.send(json.dumps({"type": "PAUSE_SESSION"}))
+                    await asyncio.sleep(args.pause_seconds / args.speed)
+                    await ws.send(json.dumps({"type": "RESUME_SESSION"}))
+                await ws.send(frame)
+                position = (i + 1) % frames_per_sentence
+                if position == 0 or (frames_per_interim and position % frames_per_interim == 0):
+                    emitted_at.append(time.perf_counter())
+                await asyncio.sleep(FRAME_SECONDS / args.speed)
+
+            # Let the last checkpoint's feedback land before ending
+            await asyncio.sleep(args.stt_latency + 0.2)
+            while not received.empty():
+                record(*received.get_nowait())
+
+            end_sent = time.perf_counter()
+            await ws.send(json.dumps({"type": "END_SESSION"}))
+            arrived, _ = await wait_for("SESSION_SUMMARY", 60)
+            result.end_latency = arrived - end_sent
+
+            if args.wait_ai:
+                arrived, _ = await wait_for("AI_ANALYSIS", 120)
+                result.ai_latency = arrived - end_sent
+
+            receiver_task.cancel()
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+async def run_level(url, sessions, args, frame):
+    # Stagger connects over one sentence so checkpoints don't all align
+    async def staggered(i):
+        await asyncio.sleep((i / sessions) * args.seconds_per_sentence / args.speed)
+        return await run_session(url, args, frame)
+
+    return await asyncio.gather(*(staggered(i) for i in range(sessions)))
+
+
+def start_server(args, db_path):
+    env = dict(os.environ)
+    env.update({
+        "ECHOMIND_TRANSCRIBER": "fake",
+        "ECHOMIND_LLM": "fake",
+        "ECHOMIND_DB_PATH": db_path,
+        "ECHOMIND_FAKE_STT_LATENCY": str(args.stt_latency),
+        "ECHOMIND_FAKE_LLM_LATENCY": str(args.llm_latency),
+        "ECHOMIND_FAKE_SECONDS_PER_SENTENCE": str(args.seconds_per_sentence),
+        "ECHOMIND_INTERIM_RESULTS": "on" if args.interim else "off",
+        "ECHOMIND_LOG_LEVEL": "WARNING",
+        "ECHOMIND_WORKERS": str(args.workers),
+    })
+    if args.transcript:
+        env["ECHOMIND_FAKE_TRANSCRIPT"] = os.path.abspath(args.transcript)
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+         "--log-level", "warning", "--ws-max-size", str(16 * 1024 * 1024),
+         "--workers", str(args.workers)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{args.port}/", timeout=1)
+            return server
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError("Backend exited during startup")
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Backend did not start in time")
+
+
+def report_level(sessions, results, cpu, wall, threshold):
+    errors = [r.error for r in results if r.error]
+    feedback = [lat for r in results for lat in r.feedback_latencies]
+    ends = [r.end_latency for r in results if r.end_latency is not None]
+    ai = [r.ai_latency for r in results if r.ai_latency is not None]
+    p99 = percentile(feedback, 0.99)
+    sustainable = not errors and bool(feedback) and p99 * 1000 <= threshold
+
+    print(f"\n=== {sessions} concurrent sessions ({wall:.1f}s) ===")
+    print(f"  completed: {len(results) - len(errors)}/{len(results)}")
+    print(f"  feedback latency  p50 {percentile(feedback, 0.5) * 1000:7.1f} ms"
+          f"   p99 {p99 * 1000:7.1f} ms   (n={len(feedback)})")
+    print(f"  END_SESSION       p50 {percentile(ends, 0.5) * 1000:7.1f} ms"
+          f"   p99 {percentile(ends, 0.99) * 1000:7.1f} ms")
+    if ai:
+        print(f"  AI_ANALYSIS       p50 {percentile(ai, 0.5) * 1000:7.1f} ms"
+              f"   p99 {percentile(ai, 0.99) * 1000:7.1f} ms")
+    if cpu is not None:
+        print(f"  server CPU        {cpu / sessions * 1000:7.1f} ms/session"
+              f"   {cpu / wall * 100:5.1f}% of one core")
+    if errors:
+        print(f"  errors: {len(errors)} (first: {errors[0]})")
+    print(f"  sustainable (p99 <= {threshold:.0f} ms, no errors): {'yes' if sustainable else 'NO'}")
+    return sustainable
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument("--levels", default="10,25,50", help="Comma-separated concurrent session counts")
+    parser.add_argument("--url", help="Target an already running backend instead of starting one")
+    parser.add_argument("--pid", type=int, help="PID of --url's server, for CPU accounting")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--sentences", type=int, default=16, help="Sentences per session")
+    parser.add_argument("--seconds-per-sentence", type=float, default=3.0)
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed-up factor")
+    parser.add_argument("--pause-seconds", type=float, default=2.0, help="Mid-session pause (0 to skip)")
+    parser.add_argument("--stt-latency", type=float, default=0.15, help="Fake transcription latency (s)")
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="Fake Gemini latency (s)")
+    parser.add_argument("--transcript", help="Recorded transcript to replay, one sentence per line")
+    parser.add_argument("--wait-ai", action="store_true", help="Also wait for AI_ANALYSIS")
+    parser.add_argument("--interim", action="store_true", help="Enable interim results")
+    parser.add_argument("--threshold-ms", type=float, default=500.0, help="p99 feedback latency budget")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(',')]
+    frame = speech_like_frame()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        pid = args.pid
+        url = args.url
+        if url is None:
+            server = start_server(args, os.path.join(tmp, 'loadtest.db'))
+            pid = server.pid
+            url = f"ws://127.0.0.1:{args.port}/ws"
+
+        max_sustainable = 0
+        try:
+            for sessions in levels:
+                cpu_before = cpu_seconds(pid) if pid else None
+                started = time.perf_counter()
+                results = asyncio.run(run_level(url, sessions, args, frame))
+                wall = time.perf_counter() - started
+                cpu_after = cpu_seconds(pid) if pid else None
+                cpu = (cpu_after - cpu_before) if cpu_before is not None and cpu_after is not None else None
+
+                if report_level(sessions, results, cpu, wall, args.threshold_ms):
+                    max_sustainable = max(max_sustainable, sessions)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+    print(f"\nMax sustainable concurrent sessions (of levels tested): {max_sustainable}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,224 @@
 import sqlite3
 from datetime import datetime
+import asyncio
 import json
+import logging
+import queue
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+
+from metrics import sqlite_latency
+
+# Applied to every connection; WAL lets readers run alongside the writer
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+)
+
+# Rollup buckets; SQLite date modifiers that map start_time to the bucket start
+ROLLUP_BUCKETS = {
+    'day': "date(?)",
+    'week': "date(?, 'weekday 0', '-6 days')",  # Monday
+}
+
+# Session list columns (no transcript or analysis bodies)
+LIST_COLUMNS = (
+    "id, session_id, start_time, end_time, duration_seconds, total_words, "
+    "total_sentences, filler_count, avg_wpm, articulation_wpm, speaking_seconds, "
+    "confidence_score, status"
+)
+
+# Full-text index over transcripts. Segment rows keep their segments.id as
+# rowid; whole transcripts stored on sessions use -sessions.id with seq -1.
+SEARCH_SCHEMA = (
+    '''CREATE VIRTUAL TABLE transcript_fts USING fts5(
+        text, session_id UNINDEXED, seq UNINDEXED, tokenize = 'porter unicode61'
+    )''',
+    '''CREATE TRIGGER IF NOT EXISTS segments_fts_insert AFTER INSERT ON segments BEGIN
+        INSERT INTO transcript_fts (rowid, text, session_id, seq)
+        VALUES (new.id, new.text, new.session_id, new.seq);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS segments_fts_delete AFTER DELETE ON segments BEGIN
+        DELETE FROM transcript_fts WHERE rowid = old.id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS sessions_fts_insert AFTER INSERT ON sessions
+    WHEN new.full_transcript IS NOT NULL BEGIN
+        INSERT INTO transcript_fts (rowid, text, session_id, seq)
+        VALUES (-new.id, new.full_transcript, new.session_id, -1);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS sessions_fts_update AFTER UPDATE OF full_transcript ON sessions
+    WHEN new.full_transcript IS NOT old.full_transcript BEGIN
+        DELETE FROM transcript_fts WHERE rowid = -old.id;
+        INSERT INTO transcript_fts (rowid, text, session_id, seq)
+        SELECT -new.id, new.full_transcript, new.session_id, -1
+        WHERE new.full_transcript IS NOT NULL;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS sessions_fts_delete AFTER DELETE ON sessions BEGIN
+        DELETE FROM transcript_fts WHERE rowid = -old.id;
+    END''',
+)
+
+logger = logging.getLogger("echomind.db")
+
+_STOP = object()
+
+# How often the writer thread looks for segment buffers nobody has flushed
+SEGMENT_CHECK_SECONDS = 0.5
+
+
+def _op_name(fn):
+    """Metric label for a db op: _end_session -> end_session"""
+    return fn.__name__.lstrip('_')
+
 
 class SessionDatabase:
-    def __init__(self, db_path="echomind_sessions.db"):
+    def __init__(self, db_path="echomind_sessions.db", batch_size=64):
         self.db_path = db_path
+        self.batch_size = batch_size
+
+        # One long-lived read connection per thread
+        self._local = threading.local()
+
+        # Set by init_database if this SQLite build has FTS5
+        self.search_enabled = False
+
+        # All writes go through a single writer thread in batched transactions
+        self._write_queue = queue.Queue()
+        # Live SegmentWriters; idle ones are flushed from the writer thread
+        self._segment_writers = weakref.WeakSet()
+        self._segment_writers_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._writer_loop, name="sqlite-writer", daemon=True)
+        self._writer.start()
+
         self.init_database()
-    
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None,
+                               check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _writer_loop(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        next_check = time.monotonic() + SEGMENT_CHECK_SECONDS
+        while True:
+            if time.monotonic() >= next_check:
+                self._flush_idle_segments()
+                next_check = time.monotonic() + SEGMENT_CHECK_SECONDS
+            try:
+                batch = [self._write_queue.get(timeout=max(0.0, next_check - time.monotonic()))]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in batch)
+            # Callers that gave up (e.g. a cancelled write_async) have nothing to wait for
+            ops = [item for item in batch
+                   if item is not _STOP and item[0].set_running_or_notify_cancel()]
+            results = []
+
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                for future, fn, args in ops:
+                    # Savepoint per op so one failure doesn't undo the batch
+                    cursor.execute("SAVEPOINT op")
+                    started = time.perf_counter()
+                    try:
+                        results.append((future, fn(cursor, *args), None))
+                        cursor.execute("RELEASE op")
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO op")
+                        cursor.execute("RELEASE op")
+                        results.append((future, None, e))
+                    sqlite_latency.labels(op=_op_name(fn)).observe(time.perf_counter() - started)
+                started = time.perf_counter()
+                cursor.execute("COMMIT")
+                sqlite_latency.labels(op='commit').observe(time.perf_counter() - started)
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                results = [(future, None, e) for future, _, _ in ops]
+
+            # Resolve only after the commit is durable; only _STOP ends this loop
+            for future, result, error in results:
+                try:
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(result)
+                except Exception as e:
+                    logger.error("❌ Could not resolve a write: %s", e)
+
+            if stop:
+                conn.close()
+                return
+
+    def _flush_idle_segments(self):
+        """Flush segments a quiet speaker left buffered past their flush interval"""
+        with self._segment_writers_lock:
+            writers = list(self._segment_writers)
+        for writer in writers:
+            try:
+                writer.flush_if_stale()
+            except Exception as e:
+                logger.error("❌ Could not flush segments: %s", e, extra={"session_id": writer.session_id})
+
+    def register_segment_writer(self, writer):
+        """Have the writer thread flush this SegmentWriter when it goes quiet"""
+        with self._segment_writers_lock:
+            self._segment_writers.add(writer)
+
+    def write(self, fn, *args):
+        """Queue fn(cursor, *args) on the writer thread; returns a Future"""
+        future = Future()
+        self._write_queue.put((future, fn, args))
+        return future
+
+    async def write_async(self, fn, *args):
+        return await asyncio.wrap_future(self.write(fn, *args))
+
+    def read(self, fn, *args):
+        """Run fn(cursor, *args) on this thread's read connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        started = time.perf_counter()
+        try:
+            return fn(conn.cursor(), *args)
+        finally:
+            sqlite_latency.labels(op=_op_name(fn)).observe(time.perf_counter() - started)
+
+    async def read_async(self, fn, *args):
+        return await asyncio.to_thread(self.read, fn, *args)
+
+    def close(self):
+        """Flush pending writes and stop the writer thread"""
+        self._write_queue.put(_STOP)
+        self._writer.join()
+
     def init_database(self):
         """Create tables if they don't exist"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        backlog = self.write(self._init_schema).result()
+        logger.info("✅ Database initialized")
+
+        if backlog:
+            # Index rows that predate the search table without holding up startup
+            threading.Thread(target=self.sync_search_index, name="fts-backfill", daemon=True).start()
+
+    def _init_schema(self, cursor):
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS sessions (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -31,30 +238,224 @@ class SessionDatabase:
                 status TEXT DEFAULT 'active'
             )
         ''')
-        
-        conn.commit()
-        conn.close()
-        print("✅ Database initialized")
-    
+
+        self._add_missing_columns(cursor, 'sessions', {
+            'ai_analysis': 'TEXT',
+            # Delivery metrics from the PCM stream
+            'speaking_seconds': 'REAL',
+            'voiced_seconds': 'REAL',
+            'silence_seconds': 'REAL',
+            'articulation_wpm': 'REAL',
+            'pause_count': 'INTEGER',
+            'long_pause_count': 'INTEGER',
+            'avg_pause_seconds': 'REAL',
+            'pause_histogram': 'TEXT',
+            'loudness_mean_db': 'REAL',
+            'loudness_std_db': 'REAL',
+            # Resumable sessions: compact coach state and last sign of life (epoch)
+            'snapshot': 'TEXT',
+            'last_seen': 'REAL',
+            # Set when a reconnect finds the session attached on another worker (epoch)
+            'takeover_requested': 'REAL',
+            # scoring.RULES_VERSION the stored scores were computed under
+            'rules_version': 'INTEGER',
+            # Unrounded pace (WPM) the scores were judged on; re-scoring reuses it
+            'pace_wpm': 'REAL',
+        })
+
+        # Transcript persisted sentence by sentence during a live session
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS segments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                timestamp REAL NOT NULL,
+                text TEXT NOT NULL,
+                word_count INTEGER DEFAULT 0,
+                filler_count INTEGER DEFAULT 0,
+                UNIQUE (session_id, seq)
+            )
+        ''')
+
+        # History listing and trend queries
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_sessions_start_time ON sessions (start_time, id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions (status)
+        ''')
+
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'session_rollups'")
+        rollups_exist = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS session_rollups (
+                bucket TEXT NOT NULL,
+                bucket_start TEXT NOT NULL,
+                sessions INTEGER DEFAULT 0,
+                total_duration INTEGER DEFAULT 0,
+                total_words INTEGER DEFAULT 0,
+                total_fillers INTEGER DEFAULT 0,
+                sum_wpm REAL DEFAULT 0,
+                sum_confidence REAL DEFAULT 0,
+                PRIMARY KEY (bucket, bucket_start)
+            )
+        ''')
+        if not rollups_exist:
+            self._rebuild_rollups(cursor)
+
+        return self._init_search(cursor)
+
+    def _init_search(self, cursor):
+        """Create the FTS5 index; returns True if existing rows need indexing"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'transcript_fts'")
+        if cursor.fetchone() is not None:
+            self.search_enabled = True
+            return self._search_backlog(cursor) > 0
+
+        try:
+            for statement in SEARCH_SCHEMA:
+                cursor.execute(statement)
+        except sqlite3.OperationalError as e:
+            logger.warning("⚠️ Full-text search unavailable: %s", e)
+            return False
+
+        # Rows already present are indexed in batches up to these marks
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_index_state (
+                source TEXT PRIMARY KEY,
+                indexed_upto INTEGER NOT NULL,
+                target INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            INSERT OR REPLACE INTO search_index_state
+            SELECT 'segments', 0, COALESCE(MAX(id), 0) FROM segments
+            UNION ALL
+            SELECT 'sessions', 0, COALESCE(MAX(id), 0) FROM sessions
+        ''')
+        self.search_enabled = True
+        return self._search_backlog(cursor) > 0
+
+    def _search_backlog(self, cursor):
+        cursor.execute("SELECT COALESCE(SUM(target - indexed_upto), 0) FROM search_index_state")
+        return cursor.fetchone()[0]
+
+    def _index_search_batch(self, cursor, batch_size):
+        """
+        Index the next batch of pre-existing rows; returns the remaining
+        backlog. Rows the triggers already indexed (inserted or updated since
+        the index was created) are skipped.
+        """
+        cursor.execute("SELECT source, indexed_upto, target FROM search_index_state")
+        for source, indexed_upto, target in cursor.fetchall():
+            if indexed_upto >= target:
+                continue
+            upto = min(indexed_upto + batch_size, target)
+            if source == 'segments':
+                cursor.execute('''
+                    INSERT INTO transcript_fts (rowid, text, session_id, seq)
+                    SELECT id, text, session_id, seq FROM segments WHERE id > ? AND id <= ?
+                      AND id NOT IN (SELECT rowid FROM transcript_fts WHERE rowid > ? AND rowid <= ?)
+                ''', (indexed_upto, upto, indexed_upto, upto))
+            else:
+                cursor.execute('''
+                    INSERT INTO transcript_fts (rowid, text, session_id, seq)
+                    SELECT -id, full_transcript, session_id, -1 FROM sessions
+                    WHERE id > ? AND id <= ? AND full_transcript IS NOT NULL
+                      AND -id NOT IN (SELECT rowid FROM transcript_fts WHERE rowid >= ? AND rowid < ?)
+                ''', (indexed_upto, upto, -upto, -indexed_upto))
+            cursor.execute('''
+                UPDATE search_index_state SET indexed_upto = ? WHERE source = ?
+            ''', (upto, source))
+
+        # Incremental merge keeps segment count (and query cost) down
+        cursor.execute("INSERT INTO transcript_fts (transcript_fts, rank) VALUES ('merge', 500)")
+        return self._search_backlog(cursor)
+
+    def sync_search_index(self, batch_size=2000):
+        """
+        Index rows that existed before the search table, one small write
+        transaction per batch so live writes keep flowing. Safe to resume.
+        """
+        if not self.search_enabled:
+            return
+        try:
+            while self.write(self._index_search_batch, batch_size).result() > 0:
+                pass
+        except Exception as e:
+            # The watermark stays at the last good batch; the next start resumes there
+            logger.error("❌ Search index backfill stopped: %s", e)
+            return
+        logger.info("🔎 Search index up to date")
+
+    def _add_missing_columns(self, cursor, table, columns):
+        """Add columns introduced after a database file was created"""
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        for name, column_type in columns.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+    def _create_session(self, cursor, session_id, start_time):
+        cursor.execute('''
+            INSERT INTO sessions (session_id, start_time, status, last_seen)
+            VALUES (?, ?, 'active', ?)
+        ''', (session_id, start_time, start_time.timestamp()))
+
     def create_session(self, session_id):
         """Start a new session"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO sessions (session_id, start_time, status)
-            VALUES (?, ?, 'active')
-        ''', (session_id, datetime.now()))
-        
-        conn.commit()
-        conn.close()
-        print(f"📝 Session created: {session_id}")
-    
-    def end_session(self, session_id, session_data):
-        """End a session and save final statistics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        self.write(self._create_session, session_id, datetime.now()).result()
+        logger.info("📝 Session created", extra={"session_id": session_id})
+
+    async def create_session_async(self, session_id):
+        await self.write_async(self._create_session, session_id, datetime.now())
+        logger.info("📝 Session created", extra={"session_id": session_id})
+
+    def _rebuild_rollups(self, cursor):
+        cursor.execute("DELETE FROM session_rollups")
+        for bucket, expression in ROLLUP_BUCKETS.items():
+            bucket_start = expression.replace('?', 'start_time')
+            cursor.execute(f'''
+                INSERT INTO session_rollups
+                    (bucket, bucket_start, sessions, total_duration, total_words,
+                     total_fillers, sum_wpm, sum_confidence)
+                SELECT ?, {bucket_start}, COUNT(*), SUM(duration_seconds), SUM(total_words),
+                       SUM(filler_count), SUM(avg_wpm), SUM(confidence_score)
+                FROM sessions WHERE status = 'completed'
+                GROUP BY {bucket_start}
+            ''', (bucket,))
+
+    def rebuild_rollups(self):
+        """Recompute trend rollups from scratch (backfill / repair)"""
+        self.write(self._rebuild_rollups).result()
+
+    def _apply_rollup(self, cursor, start_time, stats, sign):
+        """Add (sign=1) or remove (sign=-1) one session's stats in every bucket"""
+        duration, words, fillers, wpm, confidence = stats
+        for bucket, expression in ROLLUP_BUCKETS.items():
+            cursor.execute(f'''
+                INSERT INTO session_rollups
+                    (bucket, bucket_start, sessions, total_duration, total_words,
+                     total_fillers, sum_wpm, sum_confidence)
+                VALUES (?, {expression}, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (bucket, bucket_start) DO UPDATE SET
+                    sessions = sessions + excluded.sessions,
+                    total_duration = total_duration + excluded.total_duration,
+                    total_words = total_words + excluded.total_words,
+                    total_fillers = total_fillers + excluded.total_fillers,
+                    sum_wpm = sum_wpm + excluded.sum_wpm,
+                    sum_confidence = sum_confidence + excluded.sum_confidence
+            ''', (bucket, start_time, sign, sign * (duration or 0), sign * (words or 0),
+                  sign * (fillers or 0), sign * (wpm or 0), sign * (confidence or 0)))
+
+    def _end_session(self, cursor, session_id, session_data, end_time, store_transcript):
+        cursor.execute('''
+            SELECT start_time, status, duration_seconds, total_words, filler_count,
+                   avg_wpm, confidence_score
+            FROM sessions WHERE session_id = ?
+        ''', (session_id,))
+        previous = cursor.fetchone()
+
         cursor.execute('''
             UPDATE sessions SET
                 end_time = ?,
@@ -67,11 +468,24 @@ class SessionDatabase:
                 confidence_score = ?,
                 strengths = ?,
                 improvements = ?,
-                full_transcript = ?,
+                full_transcript = COALESCE(?, full_transcript),
+                speaking_seconds = ?,
+                voiced_seconds = ?,
+                silence_seconds = ?,
+                articulation_wpm = ?,
+                pause_count = ?,
+                long_pause_count = ?,
+                avg_pause_seconds = ?,
+                pause_histogram = ?,
+                loudness_mean_db = ?,
+                loudness_std_db = ?,
+                rules_version = ?,
+                pace_wpm = ?,
+                snapshot = NULL,
                 status = 'completed'
             WHERE session_id = ?
         ''', (
-            datetime.now(),
+            end_time,
             session_data.get('duration_seconds', 0),
             session_data.get('total_words', 0),
             session_data.get('total_sentences', 0),
@@ -81,24 +495,487 @@ class SessionDatabase:
             session_data.get('confidence_score', 0),
             json.dumps(session_data.get('strengths', [])),
             json.dumps(session_data.get('improvements', [])),
-            session_data.get('full_transcript', ''),
+            session_data.get('full_transcript', '') if store_transcript else None,
+            session_data.get('speaking_seconds'),
+            session_data.get('voiced_seconds'),
+            session_data.get('silence_seconds'),
+            session_data.get('articulation_wpm'),
+            session_data.get('pause_count'),
+            session_data.get('long_pause_count'),
+            session_data.get('avg_pause_seconds'),
+            json.dumps(session_data['pause_histogram']) if 'pause_histogram' in session_data else None,
+            session_data.get('loudness_mean_db'),
+            session_data.get('loudness_std_db'),
+            session_data.get('rules_version'),
+            session_data.get('pace_wpm'),
             session_id
         ))
-        
-        conn.commit()
-        conn.close()
-        print(f"💾 Session saved: {session_id}")
-    
-    def get_all_sessions(self):
-        """Get all sessions"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+
+        # Keep trend rollups current without rescanning sessions
+        if previous is not None:
+            start_time, status = previous[0], previous[1]
+            if status == 'completed':
+                self._apply_rollup(cursor, start_time, previous[2:], -1)
+            self._apply_rollup(cursor, start_time, (
+                session_data.get('duration_seconds', 0),
+                session_data.get('total_words', 0),
+                session_data.get('filler_count', 0),
+                session_data.get('avg_wpm', 0),
+                session_data.get('confidence_score', 0),
+            ), 1)
+
+    def end_session(self, session_id, session_data, store_transcript=True):
+        """End a session and save final statistics"""
+        self.write(self._end_session, session_id, session_data, datetime.now(),
+                   store_transcript).result()
+        logger.info("💾 Session saved", extra={"session_id": session_id})
+
+    async def end_session_async(self, session_id, session_data, store_transcript=True):
+        await self.write_async(self._end_session, session_id, session_data, datetime.now(),
+                               store_transcript)
+        logger.info("💾 Session saved", extra={"session_id": session_id})
+
+    def _save_ai_analysis(self, cursor, session_id, ai_analysis):
+        cursor.execute('''
+            UPDATE sessions SET ai_analysis = ? WHERE session_id = ?
+        ''', (json.dumps(ai_analysis), session_id))
+
+    def save_ai_analysis(self, session_id, ai_analysis):
+        """Attach the Gemini analysis to a finished session"""
+        self.write(self._save_ai_analysis, session_id, ai_analysis).result()
+        logger.info("💾 AI analysis saved", extra={"session_id": session_id})
+
+    async def save_ai_analysis_async(self, session_id, ai_analysis):
+        await self.write_async(self._save_ai_analysis, session_id, ai_analysis)
+        logger.info("💾 AI analysis saved", extra={"session_id": session_id})
+
+    def _get_all_sessions(self, cursor):
         cursor.execute('''
             SELECT * FROM sessions ORDER BY start_time DESC
         ''')
-        
-        sessions = cursor.fetchall()
-        conn.close()
-        
-        return sessions
\ No newline at end of file
+        rows = cursor.fetchall()
+        # Live sessions keep their transcript in segments, not full_transcript
+        columns = [d[0] for d in cursor.description]
+        transcript, session_id = columns.index('full_transcript'), columns.index('session_id')
+        return [
+            row if row[transcript] is not None else
+            row[:transcript] + (self._get_transcript(cursor, row[session_id]),) + row[transcript + 1:]
+            for row in rows
+        ]
+
+    def get_all_sessions(self):
+        """Get all sessions"""
+        return self.read(self._get_all_sessions)
+
+    def _rows_to_dicts(self, cursor):
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def _list_sessions(self, cursor, limit, before):
+        if before is None:
+            cursor.execute(f'''
+                SELECT {LIST_COLUMNS} FROM sessions
+                ORDER BY start_time DESC, id DESC LIMIT ?
+            ''', (limit + 1,))
+        else:
+            cursor.execute(f'''
+                SELECT {LIST_COLUMNS} FROM sessions
+                WHERE (start_time, id) < (?, ?)
+                ORDER BY start_time DESC, id DESC LIMIT ?
+            ''', (before[0], before[1], limit + 1))
+        rows = self._rows_to_dicts(cursor)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1]['start_time']}|{rows[-1]['id']}"
+        return {"sessions": rows, "next_cursor": next_cursor}
+
+    def list_sessions(self, limit=20, cursor=None):
+        """
+        Newest-first page of sessions without transcripts. Pass the returned
+        next_cursor back in to get the following page.
+        """
+        before = None
+        if cursor:
+            start_time, _, row_id = cursor.rpartition('|')
+            before = (start_time, int(row_id))
+        return self.read(self._list_sessions, limit, before)
+
+    def _get_session(self, cursor, session_id):
+        cursor.execute('''
+            SELECT * FROM sessions WHERE session_id = ?
+        ''', (session_id,))
+        rows = self._rows_to_dicts(cursor)
+        if not rows:
+            return None
+
+        session = rows[0]
+        session.pop('snapshot', None)  # Internal resume state
+        session.pop('takeover_requested', None)
+        for field in ('filler_details', 'strengths', 'improvements', 'ai_analysis', 'pause_histogram'):
+            if session.get(field):
+                session[field] = json.loads(session[field])
+        session['full_transcript'] = self._get_transcript(cursor, session_id)
+        return session
+
+    def get_session(self, session_id):
+        """Full detail for one session, or None"""
+        return self.read(self._get_session, session_id)
+
+    def _get_trends(self, cursor, bucket, limit):
+        cursor.execute('''
+            SELECT bucket_start, sessions, total_duration, total_words, total_fillers,
+                   sum_wpm, sum_confidence
+            FROM session_rollups
+            WHERE bucket = ? AND sessions > 0
+            ORDER BY bucket_start DESC LIMIT ?
+        ''', (bucket, limit))
+
+        trends = []
+        for start, sessions, duration, words, fillers, sum_wpm, sum_confidence in cursor.fetchall():
+            trends.append({
+                "bucket_start": start,
+                "sessions": sessions,
+                "total_duration_seconds": duration,
+                "avg_wpm": round(sum_wpm / sessions, 1),
+                "filler_rate": round(fillers / words * 100, 2) if words else 0.0,
+                "avg_confidence": round(sum_confidence / sessions, 1),
+            })
+        return trends
+
+    def get_trends(self, bucket='week', limit=12):
+        """Per-day or per-week averages read from the rollup table"""
+        if bucket not in ROLLUP_BUCKETS:
+            raise ValueError(f"Unknown bucket: {bucket}")
+        return self.read(self._get_trends, bucket, limit)
+
+    def _search(self, cursor, match, limit, offset):
+        # Rank sessions by their best-matching document on the bare index;
+        # snippets are only built for the page
+        cursor.execute('''
+            SELECT rowid, session_id, seq, MIN(rank), COUNT(*) FROM transcript_fts
+            WHERE transcript_fts MATCH ?
+            GROUP BY session_id
+            ORDER BY MIN(rank) LIMIT ? OFFSET ?
+        ''', (match, limit + 1, offset))
+        rows = cursor.fetchall()
+
+        results = []
+        for rowid, session_id, seq, rank, matches in rows[:limit]:
+            cursor.execute('''
+                SELECT snippet(transcript_fts, 0, '<mark>', '</mark>', '…', 16)
+                FROM transcript_fts WHERE transcript_fts MATCH ? AND rowid = ?
+            ''', (match, rowid))
+            snippet = cursor.fetchone()[0]
+            cursor.execute('''
+                SELECT start_time FROM sessions WHERE session_id = ?
+            ''', (session_id,))
+            session = cursor.fetchone()
+            results.append({
+                "session_id": session_id,
+                "segment": seq if seq >= 0 else None,
+                "matches": matches,
+                "start_time": session[0] if session else None,
+                "snippet": snippet,
+                "score": round(-rank, 4),
+            })
+        return {
+            "results": results,
+            "next_offset": offset + limit if len(rows) > limit else None,
+        }
+
+    def search_transcripts(self, query, limit=20, offset=0):
+        """
+        Sessions whose transcripts match, best first, each with a snippet of
+        its best-matching segment. Words are matched (with stemming) in any
+        order; wrap the query in quotes for an exact phrase.
+        """
+        if not self.search_enabled:
+            raise RuntimeError("Full-text search is not available")
+
+        terms = re.findall(r'\w+', query.lower())
+        if not terms:
+            return {"results": [], "next_offset": None}
+        if query.strip().startswith('"') and query.strip().endswith('"'):
+            match = '"' + ' '.join(terms) + '"'
+        else:
+            match = ' '.join(f'"{term}"' for term in terms)
+        return self.read(self._search, match, limit, offset)
+
+    def _insert_segments(self, cursor, rows):
+        cursor.executemany('''
+            INSERT OR IGNORE INTO segments
+                (session_id, seq, timestamp, text, word_count, filler_count)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+    def _get_transcript(self, cursor, session_id):
+        cursor.execute('''
+            SELECT full_transcript FROM sessions WHERE session_id = ?
+        ''', (session_id,))
+        row = cursor.fetchone()
+        if row is not None and row[0] is not None:
+            return row[0]
+
+        cursor.execute('''
+            SELECT text FROM segments WHERE session_id = ? ORDER BY seq
+        ''', (session_id,))
+        return ' '.join(text for (text,) in cursor.fetchall())
+
+    def get_transcript(self, session_id):
+        """Full transcript, assembled from segments if it was never stored whole"""
+        return self.read(self._get_transcript, session_id)
+
+    def _save_snapshot(self, cursor, session_id, snapshot, seen_at):
+        cursor.execute('''
+            UPDATE sessions SET snapshot = ?, last_seen = ?, takeover_requested = NULL
+            WHERE session_id = ? AND status = 'active'
+        ''', (snapshot, seen_at, session_id))
+
+    async def save_snapshot_async(self, session_id, snapshot):
+        """Store a detached session's coach state so it can be resumed later"""
+        await self.write_async(self._save_snapshot, session_id,
+                               json.dumps(snapshot, separators=(',', ':')), time.time())
+
+    def _take_snapshot(self, cursor, session_id):
+        cursor.execute('''
+            SELECT snapshot FROM sessions WHERE session_id = ? AND status = 'active'
+        ''', (session_id,))
+        row = cursor.fetchone()
+        if row is None or row[0] is None:
+            return None
+        # Cleared in the same write transaction, so only one worker can resume it
+        cursor.execute('''
+            UPDATE sessions SET snapshot = NULL, last_seen = ?, takeover_requested = NULL
+            WHERE session_id = ?
+        ''', (time.time(), session_id))
+        snapshot = json.loads(row[0])
+        cursor.execute('''
+            SELECT COALESCE(MAX(seq) + 1, 0) FROM segments WHERE session_id = ?
+        ''', (session_id,))
+        snapshot['next_seq'] = cursor.fetchone()[0]
+        snapshot['transcript'] = self._get_transcript(cursor, session_id)
+        return snapshot
+
+    async def take_snapshot_async(self, session_id):
+        """
+        Claim a resumable session: its snapshot plus transcript and next
+        segment seq, or None if it's gone or another worker claimed it first
+        """
+        return await self.write_async(self._take_snapshot, session_id)
+
+    def _request_takeover(self, cursor, session_id, requested_at):
+        cursor.execute('''
+            UPDATE sessions SET takeover_requested = ?
+            WHERE session_id = ? AND status = 'active' AND snapshot IS NULL
+        ''', (requested_at, session_id))
+        return cursor.rowcount > 0
+
+    async def request_takeover_async(self, session_id):
+        """
+        Ask the worker a session is attached on to detach it; False if it
+        isn't active or is already waiting to be resumed
+        """
+        return await self.write_async(self._request_takeover, session_id, time.time())
+
+    def _takeover_requests(self, cursor, session_ids):
+        cursor.execute('''
+            SELECT session_id FROM sessions
+            WHERE takeover_requested IS NOT NULL AND status = 'active'
+              AND session_id IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(list(session_ids)),))
+        return {session_id for (session_id,) in cursor.fetchall()}
+
+    async def takeover_requests_async(self, session_ids):
+        """Which of these sessions a reconnect on another worker is waiting for"""
+        if not session_ids:
+            return set()
+        return await self.read_async(self._takeover_requests, session_ids)
+
+    def _touch_sessions(self, cursor, session_ids, seen_at):
+        cursor.execute('''
+            UPDATE sessions SET last_seen = ?
+            WHERE status = 'active' AND session_id IN (SELECT value FROM json_each(?))
+        ''', (seen_at, json.dumps(list(session_ids))))
+
+    async def touch_sessions_async(self, session_ids):
+        """Mark sessions this worker holds as alive so no worker's sweep abandons them"""
+        if session_ids:
+            await self.write_async(self._touch_sessions, session_ids, time.time())
+
+    def _finalize_abandoned(self, cursor, cutoff, exclude):
+        # One pass: stale active rows get totals from their segments (and the
+        # snapshot, when there is one) and are marked abandoned
+        cursor.execute('''
+            WITH stale AS (
+                SELECT s.session_id,
+                       COUNT(g.id) AS sentences,
+                       COALESCE(SUM(g.word_count), 0) AS words,
+                       COALESCE(SUM(g.filler_count), 0) AS fillers,
+                       COALESCE(MAX(g.timestamp) - MIN(g.timestamp), 0) AS span,
+                       MAX(COALESCE(s.last_seen, 0), COALESCE(MAX(g.timestamp), 0)) AS seen
+                FROM sessions s LEFT JOIN segments g ON g.session_id = s.session_id
+                WHERE s.status = 'active'
+                  AND s.session_id NOT IN (SELECT value FROM json_each(?))
+                GROUP BY s.session_id
+            )
+            UPDATE sessions SET
+                status = 'abandoned',
+                end_time = CASE WHEN stale.seen > 0
+                                THEN datetime(stale.seen, 'unixepoch', 'localtime') END,
+                duration_seconds = CAST(COALESCE(json_extract(snapshot, '$.state.elapsed'),
+                                                 stale.span) AS INTEGER),
+                total_sentences = stale.sentences,
+                total_words = stale.words,
+                filler_count = stale.fillers,
+                filler_details = json_extract(snapshot, '$.state.fillers'),
+                speaking_seconds = json_extract(snapshot, '$.state.speech_time'),
+                avg_wpm = CASE WHEN COALESCE(json_extract(snapshot, '$.state.elapsed'), stale.span) > 0
+                               THEN round(stale.words * 60.0 / COALESCE(
+                                   json_extract(snapshot, '$.state.elapsed'), stale.span), 1)
+                               ELSE 0 END,
+                snapshot = NULL
+            FROM stale
+            WHERE sessions.session_id = stale.session_id
+              AND CASE WHEN stale.seen > 0 THEN stale.seen
+                       ELSE CAST(strftime('%s', sessions.start_time) AS REAL) END < ?
+        ''', (json.dumps(list(exclude)), cutoff))
+        # rowcount is -1 for statements that open with WITH
+        cursor.execute('SELECT changes()')
+        return cursor.fetchone()[0]
+
+    def finalize_abandoned(self, older_than, exclude=()):
+        """
+        Close out 'active' sessions with no sign of life for older_than
+        seconds, except the ids in exclude; returns how many were finalized
+        """
+        count = self.write(self._finalize_abandoned, time.time() - older_than, exclude).result()
+        if count:
+            logger.info("🧹 Finalized abandoned sessions", extra={"count": count})
+        return count
+
+    def _count_stale_scores(self, cursor, rules_version):
+        cursor.execute('''
+            SELECT COUNT(*) FROM sessions
+            WHERE status = 'completed' AND COALESCE(rules_version, 0) < ?
+        ''', (rules_version,))
+        return cursor.fetchone()[0]
+
+    def count_stale_scores(self, rules_version):
+        """Completed sessions scored under rules older than rules_version"""
+        return self.read(self._count_stale_scores, rules_version)
+
+    def _stale_scores(self, cursor, after_id, limit, rules_version):
+        cursor.execute('''
+            SELECT id, session_id, total_words, total_sentences, avg_wpm,
+                   articulation_wpm, long_pause_count, pace_wpm
+            FROM sessions
+            WHERE id > ? AND status = 'completed' AND COALESCE(rules_version, 0) < ?
+            ORDER BY id LIMIT ?
+        ''', (after_id, rules_version, limit))
+        columns = [d[0] for d in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for row in rows:
+            row['transcript'] = self._get_transcript(cursor, row['session_id'])
+        return rows
+
+    def stale_scores(self, after_id, limit, rules_version):
+        """
+        Next chunk of completed sessions, by id after after_id, whose scores
+        predate rules_version: the inputs re-scoring needs, transcript included
+        """
+        return self.read(self._stale_scores, after_id, limit, rules_version)
+
+    def _save_scores(self, cursor, scores):
+        updated = 0
+        for session_id, score in scores:
+            cursor.execute('''
+                SELECT start_time, duration_seconds, total_words, filler_count,
+                       avg_wpm, confidence_score
+                FROM sessions WHERE session_id = ? AND status = 'completed'
+            ''', (session_id,))
+            previous = cursor.fetchone()
+            if previous is None:
+                continue
+            cursor.execute('''
+                UPDATE sessions SET
+                    filler_count = ?,
+                    filler_details = ?,
+                    confidence_score = ?,
+                    strengths = ?,
+                    improvements = ?,
+                    rules_version = ?
+                WHERE session_id = ?
+            ''', (
+                score['filler_count'],
+                json.dumps(score['filler_details']),
+                score['confidence_score'],
+                json.dumps(score['strengths']),
+                json.dumps(score['improvements']),
+                score['rules_version'],
+                session_id,
+            ))
+            updated += cursor.rowcount
+            # Trend rollups carry filler and confidence totals
+            start_time, duration, words, _, wpm, _ = previous
+            self._apply_rollup(cursor, start_time, previous[1:], -1)
+            self._apply_rollup(cursor, start_time, (
+                duration, words, score['filler_count'], wpm, score['confidence_score']), 1)
+        return updated
+
+    def save_scores(self, scores):
+        """
+        Write re-computed (session_id, score) pairs in one transaction;
+        returns a Future of how many sessions were updated (rows no longer
+        completed are skipped)
+        """
+        return self.write(self._save_scores, scores)
+
+
+class SegmentWriter:
+    """Buffers a session's transcript segments and flushes them in small batches"""
+
+    def __init__(self, db, session_id, flush_interval_ms=2000, max_pending=16):
+        self.db = db
+        self.session_id = session_id
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+
+        self.next_seq = 0
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+        # No segment waits on the next append for longer than flush_interval
+        db.register_segment_writer(self)
+
+    def append(self, text, word_count, filler_count):
+        """Record one segment; flushes when the batch is full or stale"""
+        with self._lock:
+            self._pending.append(
+                (self.session_id, self.next_seq, time.time(), text, word_count, filler_count)
+            )
+            self.next_seq += 1
+            due = (len(self._pending) >= self.max_pending
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush_if_stale(self):
+        """Flush if segments have been waiting at least flush_interval"""
+        with self._lock:
+            due = self._pending and time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Hand pending segments to the writer thread without waiting"""
+        with self._lock:
+            rows = self._pending
+            self._pending = []
+            self._last_flush = time.monotonic()
+        if rows:
+            return self.db.write(self.db._insert_segments, rows)
+        return None
+
@@ -0,0 +1,402 @@
+"""
+Local stand-ins for the network services, for offline development and testing
+"""
+import json
+import queue
+import re
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+
+from deepgram import LiveTranscriptionEvents
+
+# linear16, 16 kHz, mono
+BYTES_PER_SECOND = 32000
+
+SAMPLE_TRANSCRIPT = [
+    "So, um, I led the migration of our payments service to Kubernetes.",
+    "We basically had a monolith that was, you know, really hard to deploy.",
+    "I think the biggest challenge was keeping the old system running.",
+    "I designed a strangler pattern and we moved one endpoint at a time.",
+    "That reduced our deploy time from two hours to about ten minutes.",
+    "Um, I also built dashboards so the team could see error rates.",
+    "Like, honestly, the hardest part was getting buy-in from other teams.",
+    "I organized weekly demos and that actually helped a lot.",
+    "We delivered the project a month early and under budget.",
+    "If I did it again, I would probably invest in testing earlier.",
+    "Sort of a lesson learned about, you know, automated contract tests.",
+    "Overall I improved reliability and the team still uses that setup.",
+]
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """Deterministic replacement for genai.GenerativeModel.generate_content"""
+
+    model_name = 'fake-gemini'
+
+    def __init__(self, latency=0.0, fail_on=None):
+        self.latency = latency
+        self.fail_on = fail_on  # Substring that makes a prompt raise
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.calls.append(prompt)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if self.fail_on and self.fail_on in prompt:
+                raise RuntimeError("Fake Gemini failure")
+            return FakeResponse(self._respond(prompt))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _respond(self, prompt):
+        if 'PARTIAL ANALYSES:' in prompt:
+            return '```json\n' + json.dumps(self._reduce(prompt)) + '\n```'
+        if 'TRANSCRIPT PART:' in prompt:
+            return json.dumps(self._analyze_chunk(prompt))
+        if 'TRANSCRIPT:' in prompt:
+            return json.dumps(self._analyze_full(prompt))
+        return "Add a concrete metric to show the impact of your work."
+
+    def _section(self, prompt, header):
+        match = re.search(header + r'\n(.*?)\n\n', prompt, re.S)
+        return match.group(1) if match else ''
+
+    def _score(self, text):
+        words = text.split()
+        return min(10, 4 + len(words) // 50)
+
+    def _analyze_chunk(self, prompt):
+        text = self._section(prompt, 'TRANSCRIPT PART:')
+        part = re.search(r'PART (\d+) OF (\d+)', prompt).group(1)
+        return {
+            "content_quality_score": self._score(text),
+            "communication_score": self._score(text),
+            "summary": f"Part {part}: {len(text.split())} words",
+            "strengths": [f"Strength from part {part}"],
+            "weaknesses": [f"Weakness from part {part}"],
+            "suggestions": [f"Suggestion from part {part}"],
+            "missing_elements": ["Quantified results"],
+        }
+
+    def _analyze_full(self, prompt):
+        text = self._section(prompt, 'TRANSCRIPT:')
+        score = self._score(text)
+        return {
+            "content_quality_score": score,
+            "content_feedback": f"Covered {len(text.split())} words of content.",
+            "communication_score": score,
+            "communication_feedback": "Clear delivery.",
+            "key_strengths": ["Relevant examples"],
+            "improvement_areas": ["Add metrics"],
+            "specific_suggestions": ["Quantify your results"],
+            "missing_elements": ["Quantified results"],
+            "overall_impression": "Solid practice session.",
+        }
+
+    def _reduce(self, prompt):
+        parts = [json.loads(line.split(': ', 1)[1])
+                 for line in self._section(prompt, 'PARTIAL ANALYSES:').splitlines()]
+
+        def merged(field):
+            items = []
+            for part in parts:
+                for item in part.get(field, []):
+                    if item not in items:
+                        items.append(item)
+            return items
+
+        def average(field):
+            return round(sum(p.get(field, 0) for p in parts) / len(parts), 1)
+
+        return {
+            "content_quality_score": average("content_quality_score"),
+            "content_feedback": ' '.join(p.get("summary", '') for p in parts),
+            "communication_score": average("communication_score"),
+            "communication_feedback": f"Merged from {len(parts)} parts.",
+            "key_strengths": merged("strengths"),
+            "improvement_areas": merged("weaknesses"),
+            "specific_suggestions": merged("suggestions"),
+            "missing_elements": merged("missing_elements"),
+            "overall_impression": f"Analysis of {len(parts)} parts.",
+        }
+
+
+def load_transcript(path=None):
+    """Sentences to replay, one per line; the built-in sample if no path"""
+    if not path:
+        return list(SAMPLE_TRANSCRIPT)
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class FakeLiveResult:
+    """Shaped like deepgram's LiveResultResponse for the fields we read"""
+
+    def __init__(self, transcript, start, duration, is_final=True):
+        words = transcript.split()
+        step = duration / max(len(words), 1)
+        self.type = "Results"
+        self.start = start
+        self.duration = duration
+        self.is_final = is_final
+        self.speech_final = is_final
+        self.channel = SimpleNamespace(alternatives=[SimpleNamespace(
+            transcript=transcript,
+            confidence=0.99,
+            words=[SimpleNamespace(word=w.strip('.,!?').lower(), punctuated_word=w,
+                                   start=start + i * step, end=start + (i + 1) * step,
+                                   confidence=0.99)
+                   for i, w in enumerate(words)],
+        )])
+
+    def to_dict(self):
+        """The Deepgram "Results" wire message"""
+        alternative = self.channel.alternatives[0]
+        return {
+            "type": self.type,
+            "channel_index": [0, 1],
+            "duration": self.duration,
+            "start": self.start,
+            "is_final": self.is_final,
+            "speech_final": self.speech_final,
+            "channel": {"alternatives": [{
+                "transcript": alternative.transcript,
+                "confidence": alternative.confidence,
+                "words": [vars(word) for word in alternative.words],
+            }]},
+            "metadata": {"request_id": "", "model_uuid": "",
+                         "model_info": {"name": "fake", "version": "", "arch": "fake"}},
+        }
+
+
+class FakeLiveConnection:
+    """
+    Stand-in for deepgram's LiveClient. Emits the next transcript sentence
+    each time seconds_per_sentence of audio has been received, after a
+    configurable latency, from its own listener thread like the real SDK.
+    With interim_results enabled it also emits the growing partial sentence
+    every interim_seconds of audio.
+    """
+
+    def __init__(self, sentences, seconds_per_sentence=3.0, latency=0.15, interim_seconds=1.0):
+        self.sentences = sentences
+        self.bytes_per_sentence = int(seconds_per_sentence * BYTES_PER_SECOND)
+        self.seconds_per_sentence = seconds_per_sentence
+        self.latency = latency
+        self.interim = False
+        self.bytes_per_interim = int(interim_seconds * BYTES_PER_SECOND)
+        self._interims = 0  # Interim results sent for the current sentence
+
+        self.bytes_received = 0
+        self.emitted = 0
+        self._handlers = {}
+        self._events = queue.Queue()
+        self._listener = None
+
+    def on(self, event, handler):
+        self._handlers.setdefault(event, []).append(handler)
+
+    def _emit(self, event, *args):
+        for handler in self._handlers.get(event, []):
+            handler(self, *args)
+
+    def start(self, options=None):
+        self.interim = bool(getattr(options, 'interim_results', False))
+        self._listener = threading.Thread(target=self._listen, name="fake-deepgram", daemon=True)
+        self._listener.start()
+        self._emit(LiveTranscriptionEvents.Open, SimpleNamespace(type="Open"))
+        return True
+
+    def _listen(self):
+        while True:
+            item = self._events.get()
+            if item is None:
+                return
+            due, result = item
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._emit(LiveTranscriptionEvents.Transcript, result)
+
+    def send(self, data):
+        if isinstance(data, str):
+            return True  # KeepAlive and other control messages
+        self.bytes_received += len(data)
+        while self.bytes_received >= (self.emitted + 1) * self.bytes_per_sentence:
+            sentence = self.sentences[self.emitted % len(self.sentences)]
+            start = self.emitted * self.seconds_per_sentence
+            result = FakeLiveResult(sentence, start, self.seconds_per_sentence)
+            self._events.put((time.monotonic() + self.latency, result))
+            self.emitted += 1
+            self._interims = 0
+        if self.interim:
+            self._send_interims()
+        return True
+
+    def _send_interims(self):
+        progress = self.bytes_received - self.emitted * self.bytes_per_sentence
+        while progress >= (self._interims + 1) * self.bytes_per_interim:
+            self._interims += 1
+            fraction = self._interims * self.bytes_per_interim / self.bytes_per_sentence
+            words = self.sentences[self.emitted % len(self.sentences)].split()
+            partial = ' '.join(words[:max(1, int(len(words) * fraction))])
+            result = FakeLiveResult(partial, self.emitted * self.seconds_per_sentence,
+                                    fraction * self.seconds_per_sentence, is_final=False)
+            self._events.put((time.monotonic() + self.latency, result))
+
+    def finish(self):
+        self._events.put(None)
+        self._emit(LiveTranscriptionEvents.Close, SimpleNamespace(type="Close"))
+        return True
+
+
+class FakeDeepgramClient:
+    """Drop-in for DeepgramClient(api_key).listen.live.v("1")"""
+
+    def __init__(self, api_key=None, sentences=None, seconds_per_sentence=3.0, latency=0.15):
+        sentences = sentences or load_transcript()
+        self.listen = SimpleNamespace(live=SimpleNamespace(
+            v=lambda version: FakeLiveConnection(sentences, seconds_per_sentence, latency)
+        ))
+
+
+class FakeDeepgramServer:
+    """
+    Local stand-in for wss://api.deepgram.com/v1/listen speaking the live
+    protocol: binary audio in, "Results" JSON out, KeepAlive / Finalize /
+    CloseStream text messages, and the ~10 s close when neither audio nor
+    a text message arrives. Point the real SDK at it with
+    DeepgramClientOptions(url=server.url), or ECHOMIND_DEEPGRAM_URL.
+    handshake_delay stands in for the TLS and auth round trips.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, sentences=None, seconds_per_sentence=3.0,
+                 latency=0.15, idle_timeout=10.0, handshake_delay=0.0):
+        self.sentences = sentences or load_transcript()
+        self.seconds_per_sentence = seconds_per_sentence
+        self.latency = latency
+        self.idle_timeout = idle_timeout
+        self.handshake_delay = handshake_delay
+        self.host = host
+        self.port = port
+
+        self.connections = 0
+        self.open_connections = 0
+        self.keepalives = 0
+        self.idle_closes = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        from websockets.sync.server import serve
+        self._server = serve(self._handle, self.host, self.port,
+                             process_request=self._process_request, compression=None)
+        self.port = self._server.socket.getsockname()[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="fake-deepgram-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._server = None
+
+    def _process_request(self, connection, request):
+        if self.handshake_delay:
+            time.sleep(self.handshake_delay)
+        if urlsplit(request.path).path.rstrip('/') != '/v1/listen':
+            return connection.respond(404, "Not Found\n")
+        return None
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _handle(self, websocket):
+        from websockets.exceptions import ConnectionClosed
+
+        query = parse_qs(urlsplit(websocket.request.path).query)
+        transcriber = FakeLiveConnection(self.sentences, self.seconds_per_sentence, self.latency)
+        transcriber.on(LiveTranscriptionEvents.Transcript,
+                       lambda _, result: self._send_json(websocket, result.to_dict()))
+        transcriber.start(SimpleNamespace(interim_results=query.get('interim_results') == ['true']))
+        self._count('connections')
+        with self._lock:
+            self.open_connections += 1
+
+        try:
+            while True:
+                try:
+                    message = websocket.recv(timeout=self.idle_timeout)
+                except TimeoutError:
+                    self._count('idle_closes')
+                    websocket.close(1011, "NET-0001: no audio or text message within the timeout window")
+                    return
+                if isinstance(message, bytes):
+                    transcriber.send(message)
+                    continue
+                kind = json.loads(message).get("type")
+                if kind == "KeepAlive":
+                    self._count('keepalives')
+                elif kind == "CloseStream":
+                    transcriber.finish()
+                    transcriber._listener.join()
+                    self._send_json(websocket, {
+                        "type": "Metadata", "request_id": str(uuid.uuid4()),
+                        "duration": transcriber.bytes_received / BYTES_PER_SECOND, "channels": 1,
+                    })
+                    websocket.close()
+                    return
+        except ConnectionClosed:
+            pass
+        finally:
+            transcriber.finish()
+            with self._lock:
+                self.open_connections -= 1
+
+    def _send_json(self, websocket, message):
+        from websockets.exceptions import ConnectionClosed
+        try:
+            websocket.send(json.dumps(message))
+        except ConnectionClosed:
+            pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the Deepgram live API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--handshake-delay", type=float, default=0.0)
+    parser.add_argument("--seconds-per-sentence", type=float, default=3.0)
+    args = parser.parse_args()
+    server = FakeDeepgramServer(port=args.port, handshake_delay=args.handshake_delay,
+                                seconds_per_sentence=args.seconds_per_sentence).start()
+    print(f"Fake Deepgram listening on {server.url}  (ECHOMIND_DEEPGRAM_URL={server.url})")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
@@ -1,34 +1,20 @@
-import google.generativeai as genai
+import asyncio
+import json
+import logging
 import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from admission import BACKGROUND, LIVE, Busy
+from analysis_cache import make_cache_key
+from metrics import gemini_latency, gemini_failures
 
 load_dotenv()
 
-class GeminiCoach:
-    def __init__(self):
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-    
-    def analyze_interview_session(self, transcript: str, session_stats: dict) -> dict:
-        """
-        Analyze interview session and provide AI coaching
-        """
-        
-        prompt = f"""You are an expert interview coach. Analyze this interview practice session.
-
-TRANSCRIPT:
-{transcript}
-
-SESSION STATISTICS:
-- Duration: {session_stats.get('duration_seconds', 0)} seconds
-- Total words: {session_stats.get('total_words', 0)}
-- Filler count: {session_stats.get('filler_count', 0)}
-- Average pace: {session_stats.get('avg_wpm', 0)} WPM
-- Filler details: {session_stats.get('filler_details', {})}
-
-Provide a comprehensive analysis in the following JSON format:
+logger = logging.getLogger("echomind.gemini")
 
-{{
+ANALYSIS_SCHEMA = """{
   "content_quality_score": <0-10>,
   "content_feedback": "<2-3 sentences about answer quality, depth, and relevance>",
   "communication_score": <0-10>,
@@ -38,46 +24,323 @@ Provide a comprehensive analysis in the following JSON format:
   "specific_suggestions": ["<actionable tip 1>", "<actionable tip 2>", "<actionable tip 3>"],
   "missing_elements": ["<what could have been added>"],
   "overall_impression": "<1-2 sentences summary>"
-}}
+}"""
+
+CHUNK_SCHEMA = """{
+  "content_quality_score": <0-10>,
+  "communication_score": <0-10>,
+  "summary": "<1-2 sentences on what was said in this part>",
+  "strengths": ["<strength>"],
+  "weaknesses": ["<weakness>"],
+  "suggestions": ["<actionable tip>"],
+  "missing_elements": ["<what could have been added>"]
+}"""
 
-Focus on:
+ANALYSIS_FOCUS = """Focus on:
 1. Answer quality (not just delivery)
 2. Content depth and specificity
 3. Structure and organization
 4. Missing key elements (metrics, examples, results)
-5. Professional communication style
+5. Professional communication style"""
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English)"""
+    return (len(text) + 3) // 4
+
+
+def _split_long_sentence(sentence: str, token_budget: int) -> list:
+    """Hard-split a sentence over token_budget on word boundaries (and a giant word by characters)"""
+    pieces = []
+    current = []
+    current_tokens = 0
+    max_chars = token_budget * 4 - 3
+    
+    for word in sentence.split():
+        while len(word) > max_chars:
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+        tokens = estimate_tokens(word) + 1
+        if current and current_tokens + tokens > token_budget:
+            pieces.append(' '.join(current))
+            current = []
+            current_tokens = 0
+        current.append(word)
+        current_tokens += tokens
+    
+    if current:
+        pieces.append(' '.join(current))
+    return pieces
+
+
+def split_transcript(transcript: str, token_budget: int) -> list:
+    """
+    Split at sentence boundaries into chunks of at most token_budget tokens;
+    a sentence longer than that (e.g. unpunctuated speech) is split on words
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    
+    sentences = []
+    for sentence in SENTENCE_BOUNDARY.split(transcript.strip()):
+        if estimate_tokens(sentence) + 1 > token_budget:
+            sentences.extend(_split_long_sentence(sentence, token_budget))
+        else:
+            sentences.append(sentence)
+    
+    for sentence in sentences:
+        if not sentence:
+            continue
+        tokens = estimate_tokens(sentence) + 1
+        if current and current_tokens + tokens > token_budget:
+            chunks.append(' '.join(current))
+            current = []
+            current_tokens = 0
+        current.append(sentence)
+        current_tokens += tokens
+    
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+def format_session_stats(session_stats: dict) -> str:
+    return f"""- Duration: {session_stats.get('duration_seconds', 0)} seconds
+- Total words: {session_stats.get('total_words', 0)}
+- Filler count: {session_stats.get('filler_count', 0)}
+- Average pace: {session_stats.get('avg_wpm', 0)} WPM
+- Filler details: {session_stats.get('filler_details', {})}"""
+
+
+class GeminiCoach:
+    def __init__(self, max_workers=4, timeout=60, cache=None, model=None,
+                 chunk_token_budget=3000, single_call_token_limit=6000, max_chunk_concurrency=4,
+                 limiter=None, queue_timeout=30):
+        self.model_name = 'gemini-1.5-flash'
+        if model is None:
+            import google.generativeai as genai  # Slow to import; only the real client needs it
+            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+            model = genai.GenerativeModel(self.model_name)
+        else:
+            # Injected stand-in (e.g. fake_backends.FakeGeminiModel)
+            self.model_name = getattr(model, 'model_name', type(model).__name__)
+        self.model = model
+        
+        # Optional AnalysisCache keyed by model name + prompt
+        self.cache = cache
+        
+        # Bounded pool so blocking SDK calls never run on the event loop
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini")
+        self.timeout = timeout
+        
+        # Optional admission.Limiter shared by every model request
+        self.limiter = limiter
+        self.queue_timeout = queue_timeout
+        
+        # Map-reduce mode for transcripts too long for one prompt
+        self.chunk_token_budget = chunk_token_budget
+        self.single_call_token_limit = single_call_token_limit
+        self.chunk_executor = ThreadPoolExecutor(
+            max_workers=max_chunk_concurrency, thread_name_prefix="gemini-chunk"
+        )
+        
+        # Live quick tips never wait behind post-session analyses for a thread
+        self.tip_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini-tip")
+    
+    def close(self):
+        """Stop the worker pools; queued requests are dropped"""
+        for executor in (self.executor, self.chunk_executor, self.tip_executor):
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _build_analysis_prompt(self, transcript: str, session_stats: dict) -> str:
+        return f"""You are an expert interview coach. Analyze this interview practice session.
+
+TRANSCRIPT:
+{transcript}
+
+SESSION STATISTICS:
+{format_session_stats(session_stats)}
+
+Provide a comprehensive analysis in the following JSON format:
+
+{ANALYSIS_SCHEMA}
+
+{ANALYSIS_FOCUS}
 
 Be constructive and specific. Provide actionable feedback."""
+    
+    def _build_chunk_prompt(self, chunk: str, index: int, total: int) -> str:
+        return f"""You are an expert interview coach. Analyze PART {index} OF {total} of an interview practice session transcript. Other parts are analyzed separately, so judge only this part.
+
+TRANSCRIPT PART:
+{chunk}
+
+Respond with JSON in the following format:
+
+{CHUNK_SCHEMA}
+
+{ANALYSIS_FOCUS}"""
+    
+    def _build_reduce_prompt(self, chunk_analyses: list, session_stats: dict) -> str:
+        parts = '\n'.join(
+            f"PART {i}: {json.dumps(analysis)}" for i, analysis in enumerate(chunk_analyses, 1)
+        )
+        return f"""You are an expert interview coach. A long interview practice session was analyzed in {len(chunk_analyses)} consecutive parts. Merge the partial analyses into one assessment of the whole session.
+
+PARTIAL ANALYSES:
+{parts}
+
+SESSION STATISTICS:
+{format_session_stats(session_stats)}
 
+Provide the combined analysis in the following JSON format:
+
+{ANALYSIS_SCHEMA}
+
+Weigh every part, remove duplicates, and keep the 3 most important items per list. Be constructive and specific."""
+    
+    def _parse_json_response(self, response_text: str) -> dict:
+        """Strip markdown fences and parse the model's JSON"""
+        response_text = response_text.strip()
+        
+        # Clean up markdown if present
+        if response_text.startswith('```json'):
+            response_text = response_text.replace('```json', '').replace('```', '').strip()
+        elif response_text.startswith('```'):
+            response_text = response_text.replace('```', '').strip()
+        
+        return json.loads(response_text)
+    
+    def _generate_content(self, prompt: str, priority=BACKGROUND, queue_timeout=None):
+        """One model request, admitted by the limiter if set"""
+        if self.limiter is not None:
+            self.limiter.acquire(priority, self.queue_timeout if queue_timeout is None else queue_timeout)
+        started = time.perf_counter()
         try:
-            response = self.model.generate_content(prompt)
-            
-            # Extract JSON from response
-            response_text = response.text.strip()
-            
-            # Clean up markdown if present
-            if response_text.startswith('```json'):
-                response_text = response_text.replace('```json', '').replace('```', '').strip()
-            elif response_text.startswith('```'):
-                response_text = response_text.replace('```', '').strip()
-            
-            import json
-            ai_analysis = json.loads(response_text)
+            return self.model.generate_content(prompt)
+        except Exception:
+            gemini_failures.inc()
+            raise
+        finally:
+            gemini_latency.observe(time.perf_counter() - started)
+            if self.limiter is not None:
+                self.limiter.release()
+    
+    def _generate_json(self, prompt: str) -> dict:
+        """Call the model for a JSON answer, going through the cache if set"""
+        key = None
+        if self.cache is not None:
+            key = make_cache_key(self.model_name, prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        response = self._generate_content(prompt)
+        result = self._parse_json_response(response.text)
+        
+        if self.cache is not None:
+            self.cache.put(key, self.model_name, result)
+        return result
+    
+    def _map_reduce_analysis(self, transcript: str, session_stats: dict) -> dict:
+        """Analyze chunks concurrently, then merge them in one reduce call"""
+        chunks = split_transcript(transcript, self.chunk_token_budget)
+        logger.info("🧩 Long transcript: analyzing %d chunks", len(chunks))
+        
+        futures = [
+            self.chunk_executor.submit(
+                self._generate_json, self._build_chunk_prompt(chunk, i, len(chunks))
+            )
+            for i, chunk in enumerate(chunks, 1)
+        ]
+        
+        chunk_analyses = []
+        failed_parts = []
+        busy = None
+        for i, future in enumerate(futures, 1):
+            try:
+                chunk_analyses.append(future.result())
+            except Busy as e:
+                busy = e
+                failed_parts.append(i)
+                logger.warning("⚠️ Chunk %d/%d not admitted: %s", i, len(chunks), e)
+            except Exception as e:
+                failed_parts.append(i)
+                logger.warning("⚠️ Chunk %d/%d failed: %s", i, len(chunks), e)
+        
+        if not chunk_analyses:
+            if busy is not None:
+                raise busy
+            raise RuntimeError("All transcript chunks failed")
+        
+        # Copy: the cached reduce result is shared
+        analysis = dict(self._generate_json(self._build_reduce_prompt(chunk_analyses, session_stats)))
+        # Which parts of the transcript the analysis actually covers
+        analysis["coverage"] = {
+            "parts": len(chunks),
+            "analyzed_parts": len(chunk_analyses),
+            "failed_parts": failed_parts,
+            "partial": bool(failed_parts),
+        }
+        return analysis
+    
+    def analyze_interview_session(self, transcript: str, session_stats: dict) -> dict:
+        """
+        Analyze interview session and provide AI coaching
+        """
+        try:
+            if estimate_tokens(transcript) <= self.single_call_token_limit:
+                prompt = self._build_analysis_prompt(transcript, session_stats)
+                ai_analysis = self._generate_json(prompt)
+            else:
+                ai_analysis = self._map_reduce_analysis(transcript, session_stats)
             
             return {
                 "success": True,
                 "analysis": ai_analysis
             }
+        
+        except Busy as e:
+            logger.warning("🚦 Gemini at capacity: %s", e)
+            return {
+                "success": False,
+                "error": str(e),
+                "busy": True,
+                "retry_after": e.retry_after,
+                "analysis": None
+            }
             
         except Exception as e:
-            print(f"❌ Gemini API error: {e}")
+            logger.error("❌ Gemini API error: %s", e)
             return {
                 "success": False,
                 "error": str(e),
                 "analysis": None
             }
     
-    def generate_quick_tip(self, recent_sentences: list) -> str:
+    async def analyze_interview_session_async(self, transcript: str, session_stats: dict) -> dict:
+        """
+        Run analyze_interview_session on the worker pool with a timeout
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self.executor, self.analyze_interview_session, transcript, session_stats
+        )
+        try:
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            gemini_failures.inc()
+            logger.error("❌ Gemini API timeout after %ss", self.timeout)
+            return {
+                "success": False,
+                "error": f"Timed out after {self.timeout}s",
+                "analysis": None
+            }
+    
+    def generate_quick_tip(self, recent_sentences: list, queue_timeout=None) -> str:
         """
         Generate a quick coaching tip based on recent speech
         """
@@ -90,8 +353,16 @@ Be constructive and specific. Provide actionable feedback."""
 Focus on content quality, not just delivery. Be encouraging but specific."""
 
         try:
-            response = self.model.generate_content(prompt)
+            # Live feedback goes ahead of queued post-session analyses
+            response = self._generate_content(prompt, LIVE, queue_timeout)
             return response.text.strip()
+        except Busy as e:
+            logger.warning("🚦 Quick tip not admitted: %s", e)
+            return None
         except Exception as e:
-            print(f"❌ Gemini quick tip error: {e}")
+            logger.error("❌ Gemini quick tip error: %s", e)
             return None
+    
+    def submit_quick_tip(self, recent_sentences: list, queue_timeout=None):
+        """generate_quick_tip on the tip pool; a concurrent Future of the tip (or None)"""
+        return self.tip_executor.submit(self.generate_quick_tip, recent_sentences, queue_timeout)
@@ -0,0 +1,93 @@
+"""
+Startup state of the backend's dependencies.
+
+The server accepts connections as soon as it's up; the database and the
+upstream clients are imported and built afterwards in a background warm-up.
+Each one is a Dependency that callers can wait on. /health/live only says
+the process is serving, while /health/ready says whether every required
+dependency is up and reports the state of each.
+"""
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("echomind.server")
+
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+
+
+class Unavailable(Exception):
+    """A dependency failed to start, or didn't finish starting in time"""
+
+
+class Dependency:
+    """One lazily built resource and how its start went"""
+
+    def __init__(self, name, required=True):
+        self.name = name
+        self.required = required
+        self.state = STARTING
+        self.value = None
+        self.error = None
+        self.seconds = None
+        self._done = asyncio.Event()
+
+    async def start(self, factory, *after):
+        """Wait for the dependencies in after, then build the value with factory()"""
+        started = time.perf_counter()
+        try:
+            for dependency in after:
+                await dependency.wait()
+            self.value = await factory()
+        except Exception as e:
+            self.state = FAILED
+            self.error = f"{type(e).__name__}: {e}"
+            logger.error("❌ %s failed to start: %s", self.name, e)
+        else:
+            self.state = READY
+            logger.info("✅ Dependency ready", extra={
+                "dependency": self.name, "seconds": round(time.perf_counter() - started, 3)})
+        finally:
+            self.seconds = time.perf_counter() - started
+            self._done.set()
+        return self.value
+
+    async def wait(self, timeout=None):
+        """The value once started; raises Unavailable if it failed or timed out"""
+        if not self._done.is_set():
+            try:
+                await asyncio.wait_for(self._done.wait(), timeout)
+            except asyncio.TimeoutError:
+                raise Unavailable(f"{self.name} is still starting") from None
+        if self.state != READY:
+            raise Unavailable(f"{self.name} is unavailable: {self.error}")
+        return self.value
+
+    def report(self):
+        report = {"state": self.state, "required": self.required}
+        if self.seconds is not None:
+            report["startup_seconds"] = round(self.seconds, 3)
+        if self.error is not None:
+            report["error"] = self.error
+        return report
+
+
+class Health:
+    def __init__(self, *dependencies):
+        self.started_at = time.monotonic()
+        self.dependencies = {dependency.name: dependency for dependency in dependencies}
+
+    def __getitem__(self, name):
+        return self.dependencies[name]
+
+    def ready(self):
+        return all(d.state == READY for d in self.dependencies.values() if d.required)
+
+    def report(self):
+        return {
+            "ready": self.ready(),
+            "uptime_seconds": round(time.monotonic() - self.started_at, 3),
+            "dependencies": {name: d.report() for name, d in self.dependencies.items()},
+        }
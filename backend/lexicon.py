@@ -0,0 +1,72 @@
+import re
+from collections import namedtuple
+
+# Detection lists
+FILLER_PHRASES = ('you know', 'i mean', 'kind of', 'sort of', 'i guess')
+FILLER_WORDS = ('um', 'uh', 'like', 'so', 'actually', 'basically', 'literally', 'yeah', 'right')
+WEAK_WORDS = ('maybe', 'probably', 'i think', 'perhaps', 'possibly')
+POWER_WORDS = ('achieved', 'implemented', 'developed', 'led', 'created',
+               'solved', 'improved', 'built', 'delivered', 'designed',
+               'managed', 'increased', 'reduced', 'optimized')
+
+FILLER = 'filler'
+WEAK = 'weak'
+POWER = 'power'
+
+ScanResult = namedtuple('ScanResult', ['word_count', 'fillers', 'weak_count', 'power_count'])
+
+
+class LexiconMatcher:
+    """Classify filler, weak and power terms in a single regex pass"""
+
+    def __init__(self, filler_phrases=FILLER_PHRASES, filler_words=FILLER_WORDS,
+                 weak_words=WEAK_WORDS, power_words=POWER_WORDS):
+        self.filler_phrases = frozenset(filler_phrases)
+        self.filler_words = frozenset(filler_words)
+        self.weak_words = frozenset(weak_words)
+        self.power_words = frozenset(power_words)
+
+        self.categories = {}
+        for term in self.power_words:
+            self.categories[term] = POWER
+        for term in self.weak_words:
+            self.categories[term] = WEAK
+        for term in self.filler_words | self.filler_phrases:
+            self.categories[term] = FILLER
+
+        # Multi-word terms go first (longest first) so "i think" wins over "i";
+        # any other word is consumed by the trailing \w+ so each token is seen once.
+        phrases = sorted((t for t in self.categories if ' ' in t), key=len, reverse=True)
+        alternatives = [re.escape(p) for p in phrases]
+        alternatives.append(r'\w+')
+        self.pattern = re.compile(r'\b(?:' + '|'.join(alternatives) + r')\b')
+
+    def scan(self, cleaned_text):
+        """Count words and classify lexicon hits in text from _clean_text"""
+        word_count = 0
+        fillers = []
+        weak_count = 0
+        power_count = 0
+        categories = self.categories
+
+        for match in self.pattern.finditer(cleaned_text):
+            token = match.group()
+            category = categories.get(token)
+            if category is None:
+                word_count += 1
+                continue
+
+            word_count += token.count(' ') + 1
+
+            if category is FILLER:
+                fillers.append(token)
+            elif category is WEAK:
+                weak_count += 1
+            else:
+                power_count += 1
+
+        return ScanResult(word_count, fillers, weak_count, power_count)
+
+
+# Built once per process and shared by every session
+DEFAULT_MATCHER = LexiconMatcher()
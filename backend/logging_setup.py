@@ -0,0 +1,170 @@
+"""
+Structured logging for the backend.
+
+Records are handed to a QueueHandler and written by a QueueListener thread,
+so formatting and stdout I/O stay off the Deepgram callback threads. Output
+is one JSON object per line by default.
+
+    ECHOMIND_LOG_LEVEL=DEBUG       per-sentence events (sampled)
+    ECHOMIND_LOG_FORMAT=text       human-readable lines for local runs
+    ECHOMIND_LOG_SAMPLE_EVERY=10   keep 1 in N live events
+    ECHOMIND_LOG_MAX_PER_SECOND=50 cap on live events across all sessions
+"""
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+def _extra_fields(record):
+    return {k: v for k, v in record.__dict__.items() if k not in _RECORD_FIELDS}
+
+
+def _exception_text(formatter, record):
+    if record.exc_info:
+        return formatter.formatException(record.exc_info)
+    return record.exc_text  # Already rendered by the queue handler
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, msg plus extra fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        exc = _exception_text(self, record)
+        if exc:
+            entry["exc"] = exc
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain message followed by key=value extra fields"""
+
+    def format(self, record):
+        line = record.getMessage()
+        fields = _extra_fields(record)
+        if fields:
+            line += '  ' + ' '.join(f"{k}={v}" for k, v in fields.items())
+        exc = _exception_text(self, record)
+        if exc:
+            line += '\n' + exc
+        return line
+
+
+class Sampler:
+    """Keep 1 in sample_every events and at most max_per_second of those"""
+
+    def __init__(self, sample_every=1, max_per_second=0):
+        self.sample_every = max(1, sample_every)
+        self.max_per_second = max_per_second
+        self._seen = itertools.count(1)
+        self._window = 0
+        self._window_count = 0
+        self._lock = threading.Lock()
+
+    def keep(self):
+        if next(self._seen) % self.sample_every:
+            return False
+        if not self.max_per_second:
+            return True
+        with self._lock:
+            window = int(time.monotonic())
+            if window != self._window:
+                self._window = window
+                self._window_count = 0
+            if self._window_count >= self.max_per_second:
+                return False
+            self._window_count += 1
+            return True
+
+
+class SampledLogger:
+    """
+    Logger for per-sentence and per-checkpoint events. The level check and
+    sampling run before a LogRecord is built, so a dropped event costs a
+    counter bump and a disabled level costs a cached lookup.
+    """
+
+    def __init__(self, logger, sampler):
+        self.logger = logger
+        self.sampler = sampler
+
+    def log(self, level, msg, **fields):
+        if self.logger.isEnabledFor(level) and self.sampler.keep():
+            self.logger.log(level, msg, extra=fields)
+
+    def debug(self, msg, **fields):
+        self.log(logging.DEBUG, msg, **fields)
+
+    def info(self, msg, **fields):
+        self.log(logging.INFO, msg, **fields)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Defer formatting to the listener thread; only resolve %-args here
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+live_log = SampledLogger(logging.getLogger("echomind.live"), Sampler())
+
+
+def setup_logging(level=None, fmt=None, sample_every=None, max_per_second=None, stream=None):
+    """Route the echomind.* loggers through a background writer; idempotent"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    level = (level or os.getenv("ECHOMIND_LOG_LEVEL", "INFO")).upper()
+    fmt = fmt or os.getenv("ECHOMIND_LOG_FORMAT", "json")
+    if sample_every is None:
+        sample_every = int(os.getenv("ECHOMIND_LOG_SAMPLE_EVERY", "10"))
+    if max_per_second is None:
+        max_per_second = int(os.getenv("ECHOMIND_LOG_MAX_PER_SECOND", "50"))
+
+    live_log.sampler.sample_every = max(1, sample_every)
+    live_log.sampler.max_per_second = max_per_second
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger("echomind")
+    root.handlers[:] = [_QueueHandler(log_queue)]
+    root.setLevel(level)
+    root.propagate = False  # uvicorn configures the root logger separately
+
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,22 +1,243 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 import asyncio
+import io
 import json
+import logging
+import math
 import os
 from dotenv import load_dotenv
-from deepgram import DeepgramClient, LiveTranscriptionEvents, LiveOptions
 import time
-from queue import Queue
 import random
-import re
 import uuid
-from database import SessionDatabase
-from collections import Counter
-from gemini_service import GeminiCoach  # NEW
+from database import SessionDatabase, SegmentWriter
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from analysis_cache import AnalysisCache
+from lexicon import DEFAULT_MATCHER
+from scoring import MIN_SPEECH_SECONDS, clean_text, count_fillers, pace_wpm, score_session
+from audio import VoiceActivityGate, DeliveryAnalyzer
+from logging_setup import setup_logging, live_log
+from admission import Limiter, Busy
+from session_registry import SessionRegistry, DetachedSession
+from health import Health, Dependency, Unavailable, READY
+from quick_tips import QuickTips
+from metrics import (
+    REGISTRY, active_sessions, sessions_resumed, audio_bytes_received, audio_bytes_forwarded,
+    session_audio_bytes, transcript_to_checkpoint, checkpoint_to_send,
+    feedback_latency, feedback_queue_depth,
+)
 
 load_dotenv()
+setup_logging()
+
+logger = logging.getLogger("echomind.server")
+
+# Offline stand-ins for load testing: ECHOMIND_TRANSCRIBER=fake / ECHOMIND_LLM=fake
+USE_FAKE_TRANSCRIBER = os.getenv("ECHOMIND_TRANSCRIBER") == "fake"
+USE_FAKE_LLM = os.getenv("ECHOMIND_LLM") == "fake"
+# Forward only speech to Deepgram; ECHOMIND_VAD=off sends every frame (still analyzed)
+USE_VAD = os.getenv("ECHOMIND_VAD", "on") != "off"
+
+# Analyze Deepgram interim results too (filler bursts surface before the final)
+USE_INTERIM_RESULTS = os.getenv("ECHOMIND_INTERIM_RESULTS", "off") == "on"
+
+# Live Gemini tips as AI_TIP messages alongside rule-based feedback (off by default)
+USE_AI_TIPS = os.getenv("ECHOMIND_AI_TIPS", "off") == "on"
+AI_TIP_INTERVAL_SECONDS = float(os.getenv("ECHOMIND_AI_TIP_INTERVAL_SECONDS", "30"))
+AI_TIP_TIMEOUT_SECONDS = float(os.getenv("ECHOMIND_AI_TIP_TIMEOUT_SECONDS", "4"))
+
+# After an upstream connect error, the client is told to retry after this long
+UPSTREAM_RETRY_SECONDS = 5.0
+
+# Gaps between timestamped words count as speaking time up to this long
+MAX_WORD_GAP_SECONDS = 0.3
+
+# uvicorn worker processes (python main.py); account-wide upstream limits are split between them
+WORKERS = max(1, int(os.getenv("ECHOMIND_WORKERS", "1")))
+
+def worker_share(total):
+    """This worker's part of an account-wide limit"""
+    return max(1, math.ceil(total / WORKERS))
+
+# The Deepgram and Gemini SDKs are imported by these factories, during warm-up
+def create_deepgram_client():
+    from deepgram import DeepgramClient, DeepgramClientOptions
+    if USE_FAKE_TRANSCRIBER:
+        from fake_backends import FakeDeepgramClient, load_transcript
+        return FakeDeepgramClient(
+            sentences=load_transcript(os.getenv("ECHOMIND_FAKE_TRANSCRIPT")),
+            seconds_per_sentence=float(os.getenv("ECHOMIND_FAKE_SECONDS_PER_SENTENCE", "3.0")),
+            latency=float(os.getenv("ECHOMIND_FAKE_STT_LATENCY", "0.15")),
+        )
+    url = os.getenv("ECHOMIND_DEEPGRAM_URL")  # e.g. a local FakeDeepgramServer
+    if url:
+        return DeepgramClient(os.getenv("DEEPGRAM_API_KEY", "local"), DeepgramClientOptions(url=url))
+    return DeepgramClient(os.getenv("DEEPGRAM_API_KEY"))
+
+def create_transcription_manager():
+    from deepgram import LiveOptions
+    from transcription import TranscriptionManager
+    deepgram = create_deepgram_client()
+    options = LiveOptions(
+        model="nova-2",
+        language="en-US",
+        smart_format=True,
+        encoding="linear16",
+        channels=1,
+        sample_rate=16000,
+        interim_results=USE_INTERIM_RESULTS
+    )
+    # Concurrent streams and new connections per second allowed upstream
+    limiter = Limiter(
+        "deepgram",
+        max_concurrent=worker_share(int(os.getenv("ECHOMIND_DEEPGRAM_MAX_STREAMS", "50"))),
+        rate=float(os.getenv("ECHOMIND_DEEPGRAM_CONNECT_RATE", "5")) / WORKERS,
+        burst=worker_share(10),
+    )
+    return TranscriptionManager(
+        lambda: deepgram.listen.live.v("1"),
+        options,
+        limiter,
+        pool_size=int(os.getenv("ECHOMIND_DEEPGRAM_POOL", "2")),
+        idle_timeout=float(os.getenv("ECHOMIND_DEEPGRAM_IDLE_SECONDS", "60")),
+        queue_timeout=float(os.getenv("ECHOMIND_DEEPGRAM_QUEUE_SECONDS", "10")),
+    )
+
+def create_audio_gate(send, analyzer):
+    return VoiceActivityGate(
+        send,
+        min_rms=float(os.getenv("ECHOMIND_VAD_MIN_RMS", "300")),
+        analyzer=analyzer,
+        passthrough=not USE_VAD,
+    )
+
+def create_llm_model():
+    if USE_FAKE_LLM:
+        from fake_backends import FakeGeminiModel
+        return FakeGeminiModel(latency=float(os.getenv("ECHOMIND_FAKE_LLM_LATENCY", "2.0")))
+    return None
+
+def create_llm_limiter():
+    # Gemini requests in flight and started per second, across all sessions
+    return Limiter(
+        "gemini",
+        max_concurrent=worker_share(int(os.getenv("ECHOMIND_GEMINI_CONCURRENCY", "4"))),
+        rate=float(os.getenv("ECHOMIND_GEMINI_RATE", "2")) / WORKERS,
+        burst=worker_share(4),
+    )
+
+# Per-process resources. Each uvicorn worker builds its own in a background
+# warm-up after it starts serving; nothing heavy happens at import.
+db = None
+gemini_coach = None
+transcription = None
+sessions = None
+
+health = Health(
+    Dependency("database"),
+    Dependency("sessions"),
+    Dependency("transcription"),
+    # Without it, sessions still run, just without AI analysis
+    Dependency("llm", required=False),
+)
+
+# How long a request made during warm-up waits for what it needs
+READY_WAIT_SECONDS = 10.0
+
+# Post-session analyses outlive the WebSocket that requested them
+background_tasks = set()
 
-app = FastAPI()
+# Warm-up builds still running in threads; shutdown waits for them
+startup_threads = set()
+
+async def build_in_thread(build):
+    """
+    asyncio.to_thread for warm-up. build() stores what it makes in its global
+    itself, so shutdown can close it even if warm-up was cancelled meanwhile.
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(build))
+    startup_threads.add(future)
+    future.add_done_callback(startup_threads.discard)
+    return await asyncio.shield(future)
+
+async def open_database():
+    def build():
+        global db
+        db = SessionDatabase(os.getenv("ECHOMIND_DB_PATH", "echomind_sessions.db"))
+        return db
+    return await build_in_thread(build)
+
+async def open_sessions():
+    global sessions
+    sessions = SessionRegistry(
+        db,
+        grace_seconds=float(os.getenv("ECHOMIND_RESUME_GRACE_SECONDS", "120")),
+        abandon_after=float(os.getenv("ECHOMIND_ABANDON_AFTER_SECONDS", "1800")),
+        sweep_interval=float(os.getenv("ECHOMIND_SWEEP_INTERVAL_SECONDS", "300")),
+        takeover_wait=float(os.getenv("ECHOMIND_TAKEOVER_WAIT_SECONDS", "10")),
+    )
+    await sessions.start()
+    return sessions
+
+async def open_transcription():
+    """Import the Deepgram SDK, then pre-warm upstream connections and start the keepalive/idle sweep"""
+    def build():
+        global transcription
+        transcription = create_transcription_manager()
+        return transcription
+    manager = await build_in_thread(build)
+    await manager.start()
+    return manager
+
+async def open_llm():
+    def build():
+        global gemini_coach
+        from gemini_service import GeminiCoach
+        gemini_coach = GeminiCoach(cache=AnalysisCache(db), model=create_llm_model(),
+                                   limiter=create_llm_limiter(),
+                                   queue_timeout=float(os.getenv("ECHOMIND_GEMINI_QUEUE_SECONDS", "30")))
+        return gemini_coach
+    return await build_in_thread(build)
+
+async def warm_up():
+    started = time.perf_counter()
+    await asyncio.gather(
+        health["database"].start(open_database),
+        health["sessions"].start(open_sessions, health["database"]),
+        health["transcription"].start(open_transcription),
+        health["llm"].start(open_llm, health["database"]),
+    )
+    logger.info("🚀 Worker ready" if health.ready() else "⚠️ Worker started without required dependencies",
+                extra={"pid": os.getpid(), "workers": WORKERS,
+                       "seconds": round(time.perf_counter() - started, 3)})
+
+async def close_resources():
+    if sessions is not None:
+        await sessions.stop()
+    if transcription is not None:
+        await transcription.stop()
+    if gemini_coach is not None:
+        gemini_coach.close()
+    if db is not None:
+        await asyncio.to_thread(db.close)
+
+@asynccontextmanager
+async def lifespan(app):
+    """Serve right away; this worker's database and clients come up in the background"""
+    warmup = asyncio.create_task(warm_up())
+    yield
+    warmup.cancel()
+    try:
+        await warmup
+    except asyncio.CancelledError:
+        pass
+    # A build cancelled mid-thread still finishes; close what it made too
+    await asyncio.gather(*startup_threads, return_exceptions=True)
+    await close_resources()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,31 +247,172 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize database and Gemini
-db = SessionDatabase()
-gemini_coach = GeminiCoach()  # NEW
+async def require(name):
+    """A dependency for an HTTP request, waiting out warm-up briefly; 503 if it isn't up"""
+    try:
+        return await health[name].wait(READY_WAIT_SECONDS)
+    except Unavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-class SessionCoach:
-    def __init__(self, session_id):
-        self.session_id = session_id
-        self.sentences = []
+class SessionState:
+    """Running aggregates for one session, kept flat in memory"""
+    __slots__ = ('sentence_count', 'word_count', 'filler_counter', 'filler_total',
+                 'transcript', 'current_window_text', 'window_start_time', 'window_speech_start',
+                 'window_words', 'window_audio_start', 'window_speech_time', 'speech_time',
+                 'last_word_end', 'stream_offset', 'session_start_time')
+    
+    def __init__(self):
+        now = time.time()
         self.sentence_count = 0
-        self.checkpoint_interval = 4
-        
+        self.word_count = 0
+        self.filler_counter = Counter()
+        self.filler_total = 0
+        # Append-only transcript buffer instead of a list of sentences
+        self.transcript = io.StringIO()
+        self.current_window_text = []
+        self.window_start_time = now
+        self.window_speech_start = 0.0
+        self.window_words = 0
+        # Word timestamps (seconds into the Deepgram stream), when available
+        self.window_audio_start = None
+        self.window_speech_time = 0.0
+        self.speech_time = 0.0
+        self.last_word_end = None
+        # Session time at which the current upstream stream's clock starts
+        self.stream_offset = 0.0
+        self.session_start_time = now
+    
+    def add_sentence(self, text, word_count):
+        """Record a sentence in the running totals"""
+        if self.sentence_count:
+            self.transcript.write(' ')
+        self.transcript.write(text)
+        self.sentence_count += 1
+        self.word_count += word_count
+        self.window_words += word_count
+        self.current_window_text.append(text)
+    
+    def add_word_timings(self, words):
+        """Accumulate speaking time from word timestamps, capping the gaps between words"""
+        if not words:
+            return
+        offset = self.stream_offset
+        spoken = 0.0
+        previous = self.last_word_end
+        for word in words:
+            start = word.start + offset
+            if previous is not None and start > previous:
+                spoken += min(start - previous, MAX_WORD_GAP_SECONDS)
+            spoken += word.end - word.start
+            previous = word.end + offset
+        if self.window_audio_start is None:
+            self.window_audio_start = words[0].start + offset
+        self.last_word_end = previous
+        self.speech_time += spoken
+        self.window_speech_time += spoken
+    
+    def clock(self):
+        """Seconds into the session: stream time from word timestamps, else wall clock"""
+        if self.last_word_end is not None:
+            return self.last_word_end
+        return time.time() - self.session_start_time
+    
+    def new_stream(self):
+        """A reopened upstream stream restarts its timestamps at zero; continue from here"""
+        self.stream_offset = self.clock()
+    
+    def window_elapsed(self):
+        if self.window_audio_start is not None:
+            return self.last_word_end - self.window_audio_start
+        return time.time() - self.window_start_time
+    
+    def add_fillers(self, fillers):
+        """Fold a checkpoint's fillers into the running counter"""
+        self.filler_counter.update(fillers)
+        self.filler_total += len(fillers)
+    
+    def reset_window(self, speech_seconds=0.0):
         self.current_window_text = []
         self.window_start_time = time.time()
-        self.session_start_time = time.time()
+        self.window_speech_start = speech_seconds
+        self.window_words = 0
+        self.window_audio_start = None
+        self.window_speech_time = 0.0
+    
+    def snapshot(self):
+        """Aggregates only; the transcript itself lives in the segments table"""
+        now = time.time()
+        return {
+            "sentences": self.sentence_count,
+            "words": self.word_count,
+            "fillers": dict(self.filler_counter),
+            "filler_total": self.filler_total,
+            "window_text": self.current_window_text,
+            "window_age": now - self.window_start_time,
+            "window_speech_start": self.window_speech_start,
+            "window_words": self.window_words,
+            "window_audio_start": self.window_audio_start,
+            "window_speech_time": self.window_speech_time,
+            "speech_time": self.speech_time,
+            "last_word_end": self.last_word_end,
+            "stream_offset": self.stream_offset,
+            "elapsed": now - self.session_start_time,
+        }
+    
+    def restore(self, snapshot, transcript=''):
+        """Continue from a snapshot; time spent disconnected isn't counted"""
+        now = time.time()
+        self.sentence_count = snapshot["sentences"]
+        self.word_count = snapshot["words"]
+        self.filler_counter = Counter(snapshot["fillers"])
+        self.filler_total = snapshot["filler_total"]
+        self.transcript = io.StringIO()
+        self.transcript.write(transcript)
+        self.current_window_text = list(snapshot["window_text"])
+        self.window_start_time = now - snapshot["window_age"]
+        self.window_speech_start = snapshot["window_speech_start"]
+        self.window_words = snapshot["window_words"]
+        self.window_audio_start = snapshot["window_audio_start"]
+        self.window_speech_time = snapshot["window_speech_time"]
+        self.speech_time = snapshot["speech_time"]
+        self.last_word_end = snapshot["last_word_end"]
+        self.stream_offset = snapshot["stream_offset"]
+        self.session_start_time = now - snapshot["elapsed"]
+    
+    def duration(self):
+        return int(time.time() - self.session_start_time)
+    
+    def avg_wpm(self, duration):
+        """Rolling WPM over the whole session"""
+        return (self.word_count / (duration / 60)) if duration > 0 else 0
+
+
+class SessionCoach:
+    def __init__(self, session_id, segment_writer=None, delivery=None):
+        self.session_id = session_id
+        # Checkpoint after this many words or seconds, whichever comes first
+        self.checkpoint_words = 40
+        self.checkpoint_seconds = 15.0
+        # Filler burst: this many fillers within burst_seconds, then a cooldown
+        self.burst_fillers = 3
+        self.burst_seconds = 5.0
+        self.burst_cooldown = 10.0
+        self.state = SessionState()
+        
+        self.recent_fillers = deque()  # (clock, count) for committed sentences
+        self.last_burst_at = None
+        
+        # Optional DeliveryAnalyzer fed from the PCM stream; gives speaking time
+        self.delivery = delivery
+        
+        # Optional SegmentWriter persisting each sentence as it arrives
+        self.segment_writer = segment_writer
         
-        self.all_fillers_found = []
-        self.all_words = []
+        # Detection lexicon (compiled once, shared by every session)
+        self.matcher = DEFAULT_MATCHER
         
-        # Detection lists
-        self.filler_phrases = ['you know', 'i mean', 'kind of', 'sort of', 'i guess']
-        self.filler_words = ['um', 'uh', 'like', 'so', 'actually', 'basically', 'literally', 'yeah', 'right']
-        self.weak_words = ['maybe', 'probably', 'i think', 'perhaps', 'possibly']
-        self.power_words = ['achieved', 'implemented', 'developed', 'led', 'created', 
-                           'solved', 'improved', 'built', 'delivered', 'designed', 
-                           'managed', 'increased', 'reduced', 'optimized']
+        # Optional on_checkpoint(sentences), e.g. to ask for an AI tip on the window
+        self.on_checkpoint = None
         
         self.is_paused = False
         
@@ -74,75 +436,89 @@ class SessionCoach:
             "Watch the filler words - be more direct",
             "Try replacing fillers with brief silence"
         ]
+        
+        self.burst_feedback = [
+            "Filler burst - pause and reset",
+            "Take a breath instead of 'um'",
+            "Slow down - let silence replace the fillers"
+        ]
     
     def _clean_text(self, text):
         """Remove punctuation and normalize text"""
-        cleaned = re.sub(r'[^\w\s]', '', text.lower())
-        cleaned = ' '.join(cleaned.split())
-        return cleaned
-    
-    def _count_fillers(self, text):
-        """Count filler words and phrases"""
-        cleaned_text = self._clean_text(text)
-        filler_count = 0
-        found_fillers = []
-        
-        for phrase in self.filler_phrases:
-            count = cleaned_text.count(phrase)
-            if count > 0:
-                filler_count += count
-                found_fillers.extend([phrase] * count)
-        
-        for phrase in self.filler_phrases:
-            cleaned_text = cleaned_text.replace(phrase, '')
-        
-        words = cleaned_text.split()
-        for word in words:
-            if word in self.filler_words:
-                filler_count += 1
-                found_fillers.append(word)
-        
-        return filler_count, found_fillers
+        return clean_text(text)
+    
+    def analyze_result(self, text: str, words=None, is_final=True):
+        """Entry point for a Deepgram result; interim text is never committed"""
+        if not is_final:
+            return self._analyze_interim(text, words)
+        return self.analyze_transcript(text, words)
     
-    def analyze_transcript(self, text: str):
-        """Collect sentences and analyze at checkpoints"""
+    def analyze_transcript(self, text: str, words=None):
+        """Collect final sentences; analyze at word/time checkpoints and on filler bursts"""
         if not text or len(text.strip()) == 0 or self.is_paused:
             return None
         
-        self.sentences.append(text)
-        self.sentence_count += 1
-        self.current_window_text.append(text)
+        state = self.state
         
-        # Track all words
-        cleaned = self._clean_text(text)
-        self.all_words.extend(cleaned.split())
+        # Track running word count
+        scan = self.matcher.scan(self._clean_text(text))
+        word_count = scan.word_count
+        if self.segment_writer is not None:
+            self.segment_writer.append(text, word_count, len(scan.fillers))
+        state.add_sentence(text, word_count)
+        state.add_word_timings(words)
+        if scan.fillers:
+            self.recent_fillers.append((state.clock(), len(scan.fillers)))
         
-        print(f"📝 Sentence {self.sentence_count}: {text}")
+        # Sampled, and without the transcript text
+        live_log.debug("📝 Sentence", session_id=self.session_id,
+                       seq=state.sentence_count, words=word_count)
         
-        if self.sentence_count % self.checkpoint_interval == 0:
+        if state.window_words >= self.checkpoint_words or state.window_elapsed() >= self.checkpoint_seconds:
             return self._analyze_checkpoint()
         
-        return None
+        return self._check_burst(state.clock())
+    
+    def _analyze_interim(self, text, words):
+        """Burst check over committed fillers plus the latest interim text"""
+        if not text or self.is_paused:
+            return None
+        interim_fillers = len(self.matcher.scan(self._clean_text(text)).fillers)
+        if not interim_fillers:
+            return None
+        now = words[-1].end + self.state.stream_offset if words else self.state.clock()
+        return self._check_burst(now, interim_fillers)
+    
+    def _check_burst(self, now, interim_fillers=0):
+        recent = self.recent_fillers
+        while recent and recent[0][0] < now - self.burst_seconds:
+            recent.popleft()
+        count = interim_fillers + sum(n for _, n in recent)
+        if count < self.burst_fillers:
+            return None
+        if self.last_burst_at is not None and now - self.last_burst_at < self.burst_cooldown:
+            return None
+        self.last_burst_at = now
+        live_log.info("⚡ Filler burst", session_id=self.session_id, fillers=count)
+        return {"type": "warning", "message": random.choice(self.burst_feedback)}
     
     def _analyze_checkpoint(self):
         """Analyze checkpoint window"""
-        print(f"\n🔍 CHECKPOINT - Analyzing last {self.checkpoint_interval} sentences...")
-        
-        full_window_text = ' '.join(self.current_window_text)
+        state = self.state
+        full_window_text = ' '.join(state.current_window_text)
         cleaned_text = self._clean_text(full_window_text)
         
-        filler_count, found_fillers = self._count_fillers(full_window_text)
-        self.all_fillers_found.extend(found_fillers)
+        # Single pass: word count plus filler/weak/power classification
+        scan = self.matcher.scan(cleaned_text)
+        found_fillers = scan.fillers
+        filler_count = len(found_fillers)
+        state.add_fillers(found_fillers)
         
-        total_words = len(cleaned_text.split())
-        window_duration = time.time() - self.window_start_time
-        wpm = (total_words / window_duration * 60) if window_duration > 0 else 0
+        total_words = scan.word_count
+        wpm = self._window_wpm(total_words)
         
-        weak_count = sum(1 for phrase in self.weak_words if phrase in cleaned_text)
-        words = cleaned_text.split()
-        power_count = sum(1 for word in words if word in self.power_words)
-        
-        print(f"   Words: {total_words} | Fillers: {filler_count} {found_fillers} | WPM: {wpm:.0f} | Power: {power_count}")
+        weak_count = scan.weak_count
+        power_count = scan.power_count
         
         feedback = None
         
@@ -174,212 +550,550 @@ class SessionCoach:
         else:
             feedback = {"type": "success", "message": random.choice(self.encouragement)}
         
-        print(f"💬 Feedback: [{feedback['type']}] {feedback['message']}\n")
+        live_log.info("🔍 Checkpoint", session_id=self.session_id, sentences=state.sentence_count,
+                      words=total_words, fillers=filler_count, filler_words=found_fillers,
+                      wpm=round(wpm), power=power_count,
+                      feedback_type=feedback['type'], feedback=feedback['message'])
         
-        self.current_window_text = []
-        self.window_start_time = time.time()
+        if self.on_checkpoint is not None:
+            self.on_checkpoint(list(state.current_window_text))
+        
+        state.reset_window(self.delivery.speech_seconds if self.delivery else 0.0)
+        if self.segment_writer is not None:
+            self.segment_writer.flush()
         
         return feedback
     
+    def _window_wpm(self, total_words):
+        """Articulation rate (words per minute of speech), else wall-clock WPM"""
+        state = self.state
+        if state.window_speech_time >= MIN_SPEECH_SECONDS:
+            return total_words / state.window_speech_time * 60
+        if self.delivery is not None:
+            speech_seconds = self.delivery.speech_seconds - state.window_speech_start
+            if speech_seconds >= MIN_SPEECH_SECONDS:
+                return total_words / speech_seconds * 60
+        window_duration = time.time() - state.window_start_time
+        return (total_words / window_duration * 60) if window_duration > 0 else 0
+    
+    def snapshot(self):
+        """Compact, JSON-able state for resuming after a reconnect"""
+        return {
+            "state": self.state.snapshot(),
+            "recent_fillers": list(self.recent_fillers),
+            "last_burst_at": self.last_burst_at,
+            "paused": self.is_paused,
+            "delivery": self.delivery.snapshot() if self.delivery is not None else None,
+        }
+    
+    def restore(self, snapshot, transcript=''):
+        self.state.restore(snapshot["state"], transcript)
+        self.recent_fillers = deque(tuple(item) for item in snapshot["recent_fillers"])
+        self.last_burst_at = snapshot["last_burst_at"]
+        self.is_paused = snapshot["paused"]
+        if self.delivery is not None and snapshot["delivery"] is not None:
+            self.delivery.restore(snapshot["delivery"])
+    
     def get_session_summary(self):
         """Generate comprehensive session summary"""
-        duration = int(time.time() - self.session_start_time)
-        total_words = len(self.all_words)
-        avg_wpm = (total_words / (duration / 60)) if duration > 0 else 0
-        
-        # Count filler breakdown
-        filler_counter = Counter(self.all_fillers_found)
-        filler_details = dict(filler_counter.most_common())
-        total_fillers = sum(filler_counter.values())
+        state = self.state
+        duration = state.duration()
+        total_words = state.word_count
+        avg_wpm = state.avg_wpm(duration)
         
-        # Calculate confidence score (0-100)
-        filler_penalty = min(total_fillers * 3, 40)
-        pace_bonus = 10 if 110 <= avg_wpm <= 160 else 0
-        confidence_score = max(60 - filler_penalty + pace_bonus, 0)
+        delivery = self.delivery.summary() if self.delivery is not None else {}
+        speaking_seconds = state.speech_time or delivery.get('speaking_seconds', 0)
+        articulation_wpm = (total_words / speaking_seconds * 60) if speaking_seconds else 0
         
-        # Determine strengths
-        strengths = []
-        if total_fillers <= 5:
-            strengths.append("Clean and articulate speech")
-        if 110 <= avg_wpm <= 160:
-            strengths.append("Perfect pacing")
-        if self.sentence_count >= 10:
-            strengths.append("Good session length")
+        # Fillers from every checkpoint, plus the window END_SESSION cut short
+        filler_counter = state.filler_counter.copy()
+        if state.current_window_text:
+            filler_counter.update(count_fillers(' '.join(state.current_window_text)))
         
-        # Determine improvements
-        improvements = []
-        if total_fillers > 8:
-            most_common_filler = filler_counter.most_common(1)[0][0] if filler_counter else "fillers"
-            improvements.append(f"Reduce '{most_common_filler}' usage")
-        if avg_wpm > 170:
-            improvements.append("Slow down your pace")
-        elif avg_wpm < 100:
-            improvements.append("Increase energy and pace")
-        
-        return {
+        summary = {
             "duration_seconds": duration,
             "total_words": total_words,
-            "total_sentences": self.sentence_count,
-            "filler_count": total_fillers,
-            "filler_details": filler_details,
+            "total_sentences": state.sentence_count,
             "avg_wpm": round(avg_wpm, 1),
-            "confidence_score": confidence_score,
-            "strengths": strengths if strengths else ["Keep practicing!"],
-            "improvements": improvements if improvements else ["You're doing great!"],
-            "full_transcript": ' '.join(self.sentences)
+            "full_transcript": state.transcript.getvalue()
         }
+        summary.update(score_session(filler_counter, pace_wpm(avg_wpm, articulation_wpm, speaking_seconds),
+                                     state.sentence_count, delivery.get('long_pause_count', 0)))
+        if speaking_seconds:
+            summary["articulation_wpm"] = round(articulation_wpm, 1)
+        summary.update(delivery)
+        # speaking_seconds is the time articulation_wpm was computed from; the VAD's estimate is kept apart
+        if 'speaking_seconds' in delivery:
+            summary["voiced_seconds"] = delivery['speaking_seconds']
+        if speaking_seconds:
+            summary["speaking_seconds"] = round(speaking_seconds, 1)
+        return summary
+
+def restore_session(session_id, claimed):
+    """Coach, audio gate and forwarded-byte count for a claimed session"""
+    if isinstance(claimed, DetachedSession):
+        sessions_resumed.labels("memory").inc()
+        return claimed.coach, claimed.gate, claimed.session_bytes
+    
+    sessions_resumed.labels("snapshot").inc()
+    writer = SegmentWriter(db, session_id)
+    writer.next_seq = claimed['next_seq']
+    delivery = DeliveryAnalyzer()
+    coach = SessionCoach(session_id, writer, delivery)
+    coach.restore(claimed, claimed['transcript'])
+    gate = create_audio_gate(None, delivery)
+    gate.restore(claimed['gate'])
+    return coach, gate, claimed['session_bytes']
 
 @app.get("/")
 async def root():
     return {"status": "EchoMind - AI-Powered Session Management", "version": "3.0"}
 
+@app.get("/health/live")
+async def health_live():
+    """The process is serving; says nothing about its dependencies"""
+    return {"status": "alive", "pid": os.getpid()}
+
+@app.get("/health/ready")
+async def health_ready():
+    """Whether every required dependency is up, with the state of each"""
+    report = health.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Hot-path metrics in Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/sessions")
+async def list_sessions(limit: int = Query(20, ge=1, le=100), cursor: str = None):
+    """Session history, newest first, paginated with next_cursor"""
+    await require("database")
+    try:
+        return await asyncio.to_thread(db.list_sessions, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/sessions/trends")
+async def session_trends(bucket: str = Query("week", pattern="^(day|week)$"),
+                         limit: int = Query(12, ge=1, le=366)):
+    """Average WPM, filler rate and confidence per day or week"""
+    await require("database")
+    return {"bucket": bucket, "trends": await asyncio.to_thread(db.get_trends, bucket, limit)}
+
+@app.get("/sessions/search")
+async def search_sessions(q: str = Query(..., min_length=1, max_length=200),
+                          limit: int = Query(20, ge=1, le=100),
+                          offset: int = Query(0, ge=0)):
+    """Ranked transcript search with highlighted snippets"""
+    await require("database")
+    if not db.search_enabled:
+        raise HTTPException(status_code=503, detail="Search is not available")
+    return await asyncio.to_thread(db.search_transcripts, q, limit, offset)
+
+@app.get("/sessions/{session_id}")
+async def session_detail(session_id: str):
+    await require("database")
+    session = await asyncio.to_thread(db.get_session, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+async def deliver_ai_analysis(websocket: WebSocket, session_id: str, summary: dict):
+    """Run Gemini off the event loop, then push AI_ANALYSIS and persist it"""
+    try:
+        await health["llm"].wait(READY_WAIT_SECONDS)
+    except Unavailable as e:
+        ai_result = {"success": False, "error": str(e), "analysis": None}
+    else:
+        limiter = gemini_coach.limiter
+        if limiter is not None and limiter.saturated():
+            # Tell the client it's waiting rather than leaving it guessing
+            await send_quietly(websocket, {
+                "type": "QUEUED", "stage": "ai_analysis", "position": limiter.queued() + 1
+            }, session_id)
+        
+        logger.info("🤖 Calling Gemini API", extra={"session_id": session_id})
+        ai_result = await gemini_coach.analyze_interview_session_async(
+            transcript=summary['full_transcript'],
+            session_stats=summary
+        )
+    
+    if ai_result['success']:
+        logger.info("✅ AI analysis complete", extra={"session_id": session_id})
+        await db.save_ai_analysis_async(session_id, ai_result['analysis'])
+    else:
+        logger.warning("⚠️ AI analysis failed: %s", ai_result.get('error', 'Unknown error'),
+                       extra={"session_id": session_id})
+        if ai_result.get('busy'):
+            await send_quietly(websocket, {
+                "type": "BUSY", "stage": "ai_analysis",
+                "retry_after": round(ai_result['retry_after'])
+            }, session_id)
+    
+    await send_quietly(websocket, {
+        "type": "AI_ANALYSIS",
+        "session_id": session_id,
+        "analysis": ai_result['analysis']
+    }, session_id)
+
+async def send_quietly(websocket: WebSocket, message: dict, session_id: str):
+    """send_json for messages that may outlive the socket"""
+    try:
+        await websocket.send_json(message)
+    except Exception as e:
+        logger.warning("⚠️ Could not deliver %s: %s", message['type'], e, extra={"session_id": session_id})
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    print("✅ Desktop app connected")
+    logger.info("✅ Desktop app connected")
     
     session_id = str(uuid.uuid4())
     coach = None
-    feedback_queue = Queue()
-    is_running = True
+    gate = None
+    session_bytes = 0
+    loop = asyncio.get_running_loop()
+    feedback_queue = asyncio.Queue()
+    
+    def enqueue_feedback(item):
+        feedback_queue.put_nowait(item)
+        feedback_queue_depth.inc()
+    
+    def push_feedback(message, arrived_at, analyzed_at):
+        """Hand feedback from the Deepgram thread to the event loop"""
+        try:
+            loop.call_soon_threadsafe(enqueue_feedback, (message, arrived_at, analyzed_at))
+        except RuntimeError:
+            pass  # Event loop already closed
+    
+    def end_session_metrics():
+        active_sessions.dec()
+        session_audio_bytes.observe(session_bytes)
     
     async def feedback_sender():
-        while is_running:
+        while True:
             try:
-                if not feedback_queue.empty():
-                    feedback = feedback_queue.get_nowait()
-                    if feedback is not None:
-                        await websocket.send_json(feedback)
+                # Wait for the next item, then drain whatever else is ready
+                batch = [await feedback_queue.get()]
+                while not feedback_queue.empty():
+                    batch.append(feedback_queue.get_nowait())
+                feedback_queue_depth.dec(len(batch))
                 
-                await asyncio.sleep(0.5)
+                for message, arrived_at, analyzed_at in batch:
+                    await websocket.send_json(message)
+                    sent_at = time.perf_counter()
+                    checkpoint_to_send.observe(sent_at - analyzed_at)
+                    feedback_latency.observe(sent_at - arrived_at)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                print(f"Error sending feedback: {e}")
+                logger.error("Error sending feedback: %s", e)
                 break
     
     sender_task = asyncio.create_task(feedback_sender())
     
-    try:
-        deepgram = DeepgramClient(os.getenv("DEEPGRAM_API_KEY"))
-        dg_connection = deepgram.listen.live.v("1")
-        
-        def on_message(self, result, **kwargs):
-            if coach and not coach.is_paused:
-                sentence = result.channel.alternatives[0].transcript
-                if len(sentence) > 0:
-                    feedback = coach.analyze_transcript(sentence)
-                    if feedback:
-                        feedback_queue.put({"type": "FEEDBACK", "data": feedback})
-        
-        def on_error(self, error, **kwargs):
-            print(f"❌ Deepgram error: {error}")
-        
-        dg_connection.on(LiveTranscriptionEvents.Transcript, on_message)
-        dg_connection.on(LiveTranscriptionEvents.Error, on_error)
-        
-        options = LiveOptions(
-            model="nova-2",
-            language="en-US",
-            smart_format=True,
-            encoding="linear16",
-            channels=1,
-            sample_rate=16000,
-            interim_results=False
-        )
+    tips = None  # QuickTips for the current session when AI tips are on
+    
+    async def send_tip(tip):
+        await send_quietly(websocket, {"type": "AI_TIP", "session_id": session_id, "tip": tip}, session_id)
+    
+    def on_checkpoint(sentences):
+        """Hand a checkpoint from the Deepgram thread to the tip scheduler"""
+        if tips is not None:
+            try:
+                loop.call_soon_threadsafe(tips.checkpoint, sentences)
+            except RuntimeError:
+                pass  # Event loop already closed
+    
+    def start_tips():
+        """Tips for the session in coach, if enabled and Gemini is up"""
+        nonlocal tips
+        stop_tips()
+        coach.on_checkpoint = on_checkpoint
+        if USE_AI_TIPS and health["llm"].state == READY:
+            tips = QuickTips(gemini_coach, send_tip, AI_TIP_INTERVAL_SECONDS, AI_TIP_TIMEOUT_SECONDS)
+    
+    def stop_tips():
+        nonlocal tips
+        if tips is not None:
+            tips.close()
+            tips = None
+    
+    def on_transcript(result):
+        arrived_at = time.perf_counter()
+        if coach and not coach.is_paused:
+            alternative = result.channel.alternatives[0]
+            sentence = alternative.transcript
+            if len(sentence) > 0:
+                feedback = coach.analyze_result(sentence, alternative.words, result.is_final)
+                if feedback:
+                    analyzed_at = time.perf_counter()
+                    transcript_to_checkpoint.observe(analyzed_at - arrived_at)
+                    push_feedback({"type": "FEEDBACK", "data": feedback}, arrived_at, analyzed_at)
+    
+    def on_error(error):
+        logger.error("❌ Deepgram error: %s", error)
+    
+    # Upstream stream, opened at START_SESSION rather than on connect
+    stream = None
+    
+    def release_stream():
+        """Close the current upstream stream without holding up this socket"""
+        nonlocal stream
+        if stream is not None:
+            stream.detach()
+            task = asyncio.create_task(transcription.release(stream))
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
+            stream = None
+    
+    async def notify_queued(position):
+        await websocket.send_json({"type": "QUEUED", "stage": "transcription", "position": position})
+    
+    retry_at = 0.0  # After BUSY, no reopen attempts before this
+    
+    async def acquire_stream():
+        """Upstream stream for this socket; if none can be had the client gets BUSY and None comes back"""
+        nonlocal stream, retry_at
+        release_stream()
+        try:
+            stream = await transcription.acquire(on_transcript, on_error, notify_queued)
+        except Busy as e:
+            retry_at = time.monotonic() + e.retry_after
+            logger.warning("🚦 No transcription capacity", extra={"session_id": session_id})
+            await websocket.send_json({
+                "type": "BUSY", "stage": "transcription", "retry_after": round(e.retry_after)
+            })
+        except Exception as e:
+            # Refused or unreachable upstream; the socket stays usable
+            retry_at = time.monotonic() + UPSTREAM_RETRY_SECONDS
+            logger.error("❌ Could not open upstream stream: %s", e, extra={"session_id": session_id})
+            await websocket.send_json({
+                "type": "BUSY", "stage": "transcription", "retry_after": round(UPSTREAM_RETRY_SECONDS),
+                "error": "upstream_unavailable"
+            })
+        return stream
+    
+    def stream_down():
+        return stream is None or stream.closed
+    
+    async def reopen_stream():
+        """Replace a stream closed for idleness; the coach's stream clock carries on"""
+        if time.monotonic() < retry_at:
+            return False
+        coach.state.new_stream()
+        if await acquire_stream() is None:
+            return False
+        gate.send = stream.send
+        logger.info("🔌 Upstream stream reopened", extra={"session_id": session_id})
+        return True
+    
+    async def services_ready():
+        """Session commands wait out warm-up briefly; False if it still isn't done"""
+        try:
+            for name in ("database", "sessions", "transcription"):
+                await health[name].wait(READY_WAIT_SECONDS)
+        except Unavailable as e:
+            logger.warning("🚦 Session command before the worker is ready: %s", e)
+            return False
+        return True
+    
+    async def finish_session():
+        """Flush and store the current session, then let it go; returns its summary"""
+        nonlocal session_bytes
+        forwarded = gate.flush()
+        session_bytes += forwarded
+        audio_bytes_forwarded.inc(forwarded)
+        release_stream()
+        stop_tips()
         
-        if not dg_connection.start(options):
-            await websocket.close()
-            return
+        # Get basic summary
+        summary = coach.get_session_summary()
+        transcript = summary['full_transcript']
         
-        print("🎤 Ready for session commands\n")
+        # Only analyze if substantial content
+        summary['ai_analysis'] = None
+        summary['ai_analysis_pending'] = len(transcript.strip()) > 50
+        summary['audio'] = gate.stats()
+        logger.info("🎙️ Audio stats", extra={"session_id": session_id, **summary['audio']})
         
+        # Save to database; the transcript is already in segments
+        coach.segment_writer.flush()
+        await db.end_session_async(session_id, summary, store_transcript=False)
+        logger.info("⏹️ Session ended", extra={"session_id": session_id})
+        end_session_metrics()
+        sessions.release(session_id)
+        return summary
+    
+    async def close_superseded():
         try:
-            while True:
-                data = await websocket.receive()
+            await websocket.close(code=4001)
+        except Exception:
+            pass  # Already gone; that's usually why the client reconnected
+    
+    async def hand_over():
+        """A newer connection claimed this session: detach it and drop this socket"""
+        nonlocal coach, gate
+        if coach is None:
+            return
+        taken, taken_gate = coach, gate
+        coach = gate = None
+        release_stream()
+        stop_tips()
+        active_sessions.dec()
+        logger.info("🔀 Session handed to a new connection", extra={"session_id": session_id})
+        await sessions.detach(session_id, taken, taken_gate, session_bytes)
+        task = asyncio.create_task(close_superseded())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    
+    logger.info("🎤 Ready for session commands")
+    
+    try:
+        while True:
+            data = await websocket.receive()
+            
+            # Handle control commands
+            if 'text' in data:
+                message = json.loads(data['text'])
+                
+                if message['type'] == 'START_SESSION':
+                    if not await services_ready():
+                        await websocket.send_json({"type": "BUSY", "stage": "startup", "retry_after": 5})
+                        continue
+                    if coach:
+                        # Restarted without END_SESSION; close out the old one the same way
+                        await finish_session()
+                        coach = gate = None
+                    if await acquire_stream() is None:
+                        continue
+                    session_id = str(uuid.uuid4())
+                    sessions.attach(session_id, hand_over)
+                    delivery = DeliveryAnalyzer()
+                    coach = SessionCoach(session_id, SegmentWriter(db, session_id), delivery)
+                    gate = create_audio_gate(stream.send, delivery)
+                    start_tips()
+                    session_bytes = 0
+                    active_sessions.inc()
+                    await db.create_session_async(session_id)
+                    logger.info("▶️ Session started", extra={"session_id": session_id})
+                    await websocket.send_json({
+                        "type": "SESSION_STARTED",
+                        "session_id": session_id
+                    })
                 
-                # Handle control commands
-                if 'text' in data:
-                    message = json.loads(data['text'])
-                    
-                    if message['type'] == 'START_SESSION':
-                        coach = SessionCoach(session_id)
-                        db.create_session(session_id)
-                        print(f"▶️ Session started: {session_id}")
+                elif message['type'] == 'PAUSE_SESSION':
+                    if coach:
+                        coach.is_paused = True
+                        if stream is not None:
+                            stream.paused = True  # Kept alive by the manager, closed if the pause outlasts idle_timeout
+                        logger.info("⏸️ Session paused", extra={"session_id": session_id})
+                        await websocket.send_json({"type": "SESSION_PAUSED"})
+                
+                elif message['type'] == 'RESUME_SESSION' and not coach and message.get('session_id'):
+                    # Reconnected client picking up where it left off
+                    if not await services_ready():
+                        # "Try again later": the client reconnects and resumes then
+                        await websocket.close(code=1013)
+                        break
+                    claimed = await sessions.claim(message['session_id'])
+                    if claimed is None:
                         await websocket.send_json({
-                            "type": "SESSION_STARTED",
-                            "session_id": session_id
+                            "type": "RESUME_FAILED", "session_id": message['session_id']
                         })
-                    
-                    elif message['type'] == 'PAUSE_SESSION':
-                        if coach:
-                            coach.is_paused = True
-                            print("⏸️ Session paused")
-                            await websocket.send_json({"type": "SESSION_PAUSED"})
-                    
-                    elif message['type'] == 'RESUME_SESSION':
-                        if coach:
-                            coach.is_paused = False
-                            print("▶️ Session resumed")
-                            await websocket.send_json({"type": "SESSION_RESUMED"})
-                    
-                    elif message['type'] == 'END_SESSION':
-                        if coach:
-                            print("\n🧠 Generating AI analysis...")
-                            
-                            # Get basic summary
-                            summary = coach.get_session_summary()
-                            
-                            # Get AI analysis from Gemini
-                            transcript = summary['full_transcript']
-                            
-                            if len(transcript.strip()) > 50:  # Only analyze if substantial content
-                                print("🤖 Calling Gemini API...")
-                                ai_result = gemini_coach.analyze_interview_session(
-                                    transcript=transcript,
-                                    session_stats=summary
-                                )
-                                
-                                if ai_result['success']:
-                                    print("✅ AI analysis complete!")
-                                    summary['ai_analysis'] = ai_result['analysis']
-                                else:
-                                    print(f"⚠️ AI analysis failed: {ai_result.get('error', 'Unknown error')}")
-                                    summary['ai_analysis'] = None
-                            else:
-                                print("⚠️ Transcript too short for AI analysis")
-                                summary['ai_analysis'] = None
-                            
-                            # Save to database
-                            db.end_session(session_id, summary)
-                            print(f"⏹️ Session ended: {session_id}\n")
-                            
-                            # Send summary with AI analysis
-                            await websocket.send_json({
-                                "type": "SESSION_SUMMARY",
-                                "summary": summary
-                            })
-                            coach = None
+                        continue
+                    session_id = message['session_id']
+                    coach, gate, session_bytes = restore_session(session_id, claimed)
+                    coach.state.new_stream()
+                    coach.is_paused = bool(message.get('paused'))
+                    active_sessions.inc()
+                    if await acquire_stream() is None:
+                        active_sessions.dec()
+                        await sessions.detach(session_id, coach, gate, session_bytes)
+                        coach = gate = None
+                        continue
+                    gate.send = stream.send
+                    stream.paused = coach.is_paused
+                    sessions.attach(session_id, hand_over)
+                    start_tips()
+                    logger.info("🔁 Session reattached", extra={
+                        "session_id": session_id, "sentences": coach.state.sentence_count})
+                    await websocket.send_json({
+                        "type": "SESSION_RESUMED",
+                        "session_id": session_id,
+                        "paused": coach.is_paused,
+                        "total_sentences": coach.state.sentence_count,
+                        "total_words": coach.state.word_count,
+                    })
                 
-                # Handle audio data
-                elif 'bytes' in data and coach and not coach.is_paused:
-                    audio_data = data['bytes']
-                    dg_connection.send(audio_data)
-                    
-        except WebSocketDisconnect:
-            print("❌ Desktop app disconnected")
-        except Exception as e:
-            print(f"Error: {e}")
-        finally:
-            is_running = False
-            sender_task.cancel()
-            try:
-                await sender_task
-            except asyncio.CancelledError:
-                pass
-            dg_connection.finish()
+                elif message['type'] == 'RESUME_SESSION':
+                    if coach:
+                        coach.is_paused = False
+                        if not stream_down() or await reopen_stream():
+                            stream.paused = False
+                        logger.info("▶️ Session resumed", extra={"session_id": session_id})
+                        await websocket.send_json({"type": "SESSION_RESUMED"})
+                
+                elif message['type'] == 'END_SESSION':
+                    if coach:
+                        summary = await finish_session()
+                        ai_pending = summary['ai_analysis_pending']
+                        
+                        # Send local stats right away; AI_ANALYSIS follows
+                        await websocket.send_json({
+                            "type": "SESSION_SUMMARY",
+                            "summary": summary
+                        })
+                        
+                        if ai_pending:
+                            logger.info("🧠 Generating AI analysis", extra={"session_id": session_id})
+                            task = asyncio.create_task(
+                                deliver_ai_analysis(websocket, session_id, summary)
+                            )
+                            background_tasks.add(task)
+                            task.add_done_callback(background_tasks.discard)
+                        else:
+                            logger.info("⚠️ Transcript too short for AI analysis", extra={"session_id": session_id})
+                        coach = None
+                        gate = None
             
+            # Handle audio data
+            elif 'bytes' in data and coach and not coach.is_paused:
+                if stream_down() and not await reopen_stream():
+                    continue  # Dropped until transcription capacity frees up
+                audio_data = data['bytes']
+                audio_bytes_received.inc(len(audio_data))
+                forwarded = gate.process(audio_data)
+                session_bytes += forwarded
+                audio_bytes_forwarded.inc(forwarded)
+                
+    except WebSocketDisconnect:
+        logger.info("❌ Desktop app disconnected")
     except Exception as e:
-        print(f"Error: {e}")
-        await websocket.close()
+        logger.error("Error: %s", e)
+    finally:
+        sender_task.cancel()
+        try:
+            await sender_task
+        except asyncio.CancelledError:
+            pass
+        feedback_queue_depth.dec(feedback_queue.qsize())
+        stop_tips()
+        if stream is not None:
+            await transcription.release(stream)
+        if coach:
+            # Keep the session resumable instead of leaving the row active for good
+            active_sessions.dec()
+            try:
+                await sessions.detach(session_id, coach, gate, session_bytes)
+            except Exception as e:
+                logger.error("Could not snapshot session: %s", e, extra={"session_id": session_id})
+        latency = feedback_latency.snapshot()
+        logger.info("⏱️ Feedback latency", extra={
+            "p50_ms": round(latency['p50'] * 1000), "p99_ms": round(latency['p99'] * 1000),
+            "count": latency['count'],
+        })
 
 if __name__ == "__main__":
     import uvicorn
@@ -387,4 +1101,8 @@ if __name__ == "__main__":
     print("🧠 Features: Real-time feedback + Gemini AI analysis")
     print("📡 WebSocket: ws://localhost:8000/ws")
     print("🎯 Version: 3.0 with AI\n")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if WORKERS > 1:
+        # Workers need an import string; each one opens its own resources at startup
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,313 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Hot-path updates are lock-free: every thread accumulates into its own cells
+and readers merge them at scrape time. Cells of finished threads are folded
+into a retired total whenever a new thread registers and at scrape time, so
+short-lived Deepgram threads don't pile up even if nobody scrapes.
+"""
+import bisect
+import threading
+
+# Latency buckets in seconds (upper bounds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = tuple(4 ** i * 1024 for i in range(1, 10))  # 4 KiB .. 256 MiB
+
+
+class _PerThread:
+    """Per-thread dict of cells, merged on read"""
+
+    def __init__(self, new_cell, merge):
+        self._new_cell = new_cell
+        self._merge = merge
+        self._local = threading.local()
+        self._threads = []  # (thread, cells)
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def cells(self):
+        cells = getattr(self._local, 'cells', None)
+        if cells is None:
+            cells = self._local.cells = {}
+            with self._lock:
+                self._retire_dead()
+                self._threads.append((threading.current_thread(), cells))
+        return cells
+
+    def cell(self, key):
+        cells = self.cells()
+        cell = cells.get(key)
+        if cell is None:
+            cell = cells[key] = self._new_cell()
+        return cell
+
+    def _retire_dead(self):
+        """Fold finished threads' cells into the retired total; hold _lock"""
+        alive = []
+        for thread, cells in self._threads:
+            if thread.is_alive():
+                alive.append((thread, cells))
+            else:
+                self._fold(self._retired, cells)
+        self._threads = alive
+
+    def merged(self):
+        with self._lock:
+            self._retire_dead()
+            total = {}
+            self._fold(total, self._retired)
+            for _, cells in self._threads:
+                self._fold(total, cells)
+        return total
+
+    def _fold(self, into, cells):
+        for key, cell in list(cells.items()):
+            if key in into:
+                into[key] = self._merge(into[key], cell)
+            else:
+                into[key] = self._merge(self._new_cell(), cell)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (name + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+               for name, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            child = self._children.setdefault(values, _Child(self, values))
+        return child
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def _series(self):
+        """Merged cells by label values; unlabeled metrics always report"""
+        series = self._values.merged()
+        if not self.labelnames and () not in series:
+            series[()] = self._values._new_cell()
+        return sorted(series.items())
+
+
+class _Child:
+    __slots__ = ('metric', 'key')
+
+    def __init__(self, metric, key):
+        self.metric = metric
+        self.key = key
+
+    def inc(self, amount=1):
+        self.metric._inc(self.key, amount)
+
+    def dec(self, amount=1):
+        self.metric._inc(self.key, -amount)
+
+    def observe(self, value):
+        self.metric._observe(self.key, value)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values = _PerThread(lambda: [0.0], lambda a, b: [a[0] + b[0]])
+
+    def _inc(self, key, amount):
+        self._values.cell(key)[0] += amount
+
+    def inc(self, amount=1):
+        self._inc((), amount)
+
+    def value(self, *labels):
+        cell = self._values.merged().get(tuple(str(v) for v in labels))
+        return cell[0] if cell else 0.0
+
+    def render(self):
+        lines = self.header()
+        for key, cell in self._series():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {cell[0]:g}")
+        return lines
+
+
+class Gauge(Counter):
+    """Up/down value from per-thread deltas, or read from a callback"""
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labelnames=(), function=None):
+        super().__init__(name, help_text, labelnames)
+        self._function = function
+
+    def dec(self, amount=1):
+        self._inc((), -amount)
+
+    def set_function(self, function):
+        self._function = function
+
+    def render(self):
+        if self._function is None:
+            return super().render()
+        return self.header() + [f"{self.name} {self._function():g}"]
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram"""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text='', labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text or name, labelnames)
+        self.buckets = tuple(buckets)
+        size = len(self.buckets) + 1
+        # Cell layout: [bucket counts..., +Inf count, sum, count]
+        self._values = _PerThread(
+            lambda: [0] * size + [0.0, 0],
+            lambda a, b: [x + y for x, y in zip(a, b)],
+        )
+
+    def _observe(self, key, value):
+        cell = self._values.cell(key)
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def observe(self, value):
+        self._observe((), value)
+
+    def _totals(self, labels=()):
+        return self._values.merged().get(tuple(str(v) for v in labels))
+
+    def quantile(self, q, *labels):
+        """Approximate quantile as the upper bound of the matching bucket"""
+        cell = self._totals(labels)
+        if not cell or cell[-1] == 0:
+            return 0.0
+        target = q * cell[-1]
+        seen = 0
+        for index, bucket_count in enumerate(cell[:len(self.buckets) + 1]):
+            seen += bucket_count
+            if seen >= target:
+                return self.buckets[index] if index < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def snapshot(self, *labels):
+        cell = self._totals(labels)
+        count = cell[-1] if cell else 0
+        total = cell[-2] if cell else 0.0
+        return {
+            "count": count,
+            "avg": (total / count) if count else 0.0,
+            "p50": self.quantile(0.5, *labels),
+            "p99": self.quantile(0.99, *labels),
+        }
+
+    def render(self):
+        lines = self.header()
+        for key, cell in self._series():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), cell):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', le)])} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {cell[-2]:g}")
+            lines.append(f"{self.name}_count{labels} {cell[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# Sessions and upstream connections
+active_sessions = REGISTRY.register(Gauge(
+    "echomind_active_sessions", "Sessions between START_SESSION and END_SESSION"))
+detached_sessions = REGISTRY.register(Gauge(
+    "echomind_detached_sessions", "Disconnected sessions held in memory for resume"))
+sessions_resumed = REGISTRY.register(Counter(
+    "echomind_sessions_resumed_total", "Sessions resumed after a reconnect", ("source",)))
+deepgram_connections = REGISTRY.register(Gauge(
+    "echomind_deepgram_connections", "Open upstream transcription connections"))
+deepgram_pool_size = REGISTRY.register(Gauge(
+    "echomind_deepgram_pool_size", "Pre-warmed upstream connections waiting for a session"))
+deepgram_acquired = REGISTRY.register(Counter(
+    "echomind_deepgram_acquired_total", "Upstream connections handed to sessions", ("pool",)))
+deepgram_connect_latency = REGISTRY.register(Histogram(
+    "echomind_deepgram_connect_seconds", "Upstream connection handshake latency"))
+
+# Admission control (upstream concurrency and rate limits)
+admission_wait = REGISTRY.register(Histogram(
+    "echomind_admission_wait_seconds", "Time queued before a limiter admitted a request",
+    ("limiter", "priority"), buckets=LATENCY_BUCKETS + (30.0, 60.0)))
+admission_queue_depth = REGISTRY.register(Gauge(
+    "echomind_admission_queue_depth", "Requests waiting for a limiter slot", ("limiter",)))
+admission_in_flight = REGISTRY.register(Gauge(
+    "echomind_admission_in_flight", "Requests holding a limiter slot", ("limiter",)))
+admission_rejected = REGISTRY.register(Counter(
+    "echomind_admission_rejected_total", "Requests turned away as BUSY", ("limiter",)))
+
+# Audio
+audio_bytes_received = REGISTRY.register(Counter(
+    "echomind_audio_bytes_received_total", "PCM bytes received from desktop clients"))
+audio_bytes_forwarded = REGISTRY.register(Counter(
+    "echomind_audio_bytes_forwarded_total", "PCM bytes forwarded to transcription"))
+session_audio_bytes = REGISTRY.register(Histogram(
+    "echomind_session_audio_bytes", "PCM bytes forwarded per session", buckets=SIZE_BUCKETS))
+
+# Live feedback pipeline
+transcript_to_checkpoint = REGISTRY.register(Histogram(
+    "echomind_transcript_to_checkpoint_seconds", "Transcript received to checkpoint analyzed"))
+checkpoint_to_send = REGISTRY.register(Histogram(
+    "echomind_checkpoint_to_send_seconds", "Checkpoint analyzed to FEEDBACK sent"))
+# Time from Deepgram transcript arrival to FEEDBACK send_json
+feedback_latency = REGISTRY.register(Histogram(
+    "echomind_feedback_latency_seconds", "Transcript received to FEEDBACK sent"))
+feedback_queue_depth = REGISTRY.register(Gauge(
+    "echomind_feedback_queue_depth", "Feedback messages waiting to be sent, all sessions"))
+
+# Gemini
+gemini_latency = REGISTRY.register(Histogram(
+    "echomind_gemini_request_seconds", "Gemini generate_content latency",
+    buckets=LATENCY_BUCKETS + (30.0, 60.0)))
+gemini_failures = REGISTRY.register(Counter(
+    "echomind_gemini_failures_total", "Failed or timed out Gemini requests"))
+gemini_cache_hits = REGISTRY.register(Counter(
+    "echomind_gemini_cache_hits_total", "Analysis cache hits", ("tier",)))
+gemini_cache_misses = REGISTRY.register(Counter(
+    "echomind_gemini_cache_misses_total", "Analysis cache misses"))
+quick_tips = REGISTRY.register(Counter(
+    "echomind_quick_tips_total", "Live AI tip requests by outcome", ("outcome",)))
+
+# SQLite
+sqlite_latency = REGISTRY.register(Histogram(
+    "echomind_sqlite_operation_seconds", "SQLite operation latency", ("op",)))
@@ -0,0 +1,78 @@
+"""
+Live AI coaching tips, kept off the feedback path.
+
+Every checkpoint still gets its rule-based FEEDBACK straight away. When tips
+are on, the checkpoint's sentences are also handed to the session's
+QuickTips, which asks GeminiCoach.generate_quick_tip for a tip and sends it
+as a separate AI_TIP message. Per session there is at most one request in
+flight and requests are at least min_interval apart. A checkpoint that
+arrives while one is waiting replaces it rather than queueing behind it,
+and a tip that takes longer than timeout is dropped. Nothing is sent in its
+place: the checkpoint's rule-based FEEDBACK already went out, and that is
+the fallback.
+"""
+import asyncio
+import logging
+import time
+
+from metrics import quick_tips
+
+logger = logging.getLogger("echomind.gemini")
+
+
+class QuickTips:
+    """One session's tip requests; all methods run on the event loop"""
+
+    def __init__(self, gemini, send, min_interval=30.0, timeout=4.0):
+        self.gemini = gemini
+        self.send = send  # async send(tip)
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self._pending = None  # Sentences of the newest checkpoint not yet asked about
+        self._task = None
+        self._last_request = float('-inf')
+        self._closed = False
+
+    def checkpoint(self, sentences):
+        """Ask for a tip on these sentences once the session's slot is free"""
+        if self._closed:
+            return  # Scheduled from the Deepgram thread just before close()
+        if self._pending is not None:
+            quick_tips.labels("superseded").inc()
+        self._pending = sentences
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self._pending is not None:
+            delay = self._last_request + self.min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            sentences, self._pending = self._pending, None
+            self._last_request = time.monotonic()
+            await self._request(sentences)
+
+    async def _request(self, sentences):
+        future = asyncio.wrap_future(self.gemini.submit_quick_tip(sentences, self.timeout))
+        try:
+            tip = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            # The checkpoint's rule-based FEEDBACK stands on its own
+            quick_tips.labels("timeout").inc()
+            logger.info("⌛ Quick tip dropped after %.1fs", self.timeout)
+            # A late call still holds this session's slot until it returns
+            await future
+            return
+        if not tip:
+            quick_tips.labels("failed").inc()
+            return
+        if self._closed:
+            return
+        quick_tips.labels("sent").inc()
+        await self.send(tip)
+
+    def close(self):
+        self._closed = True
+        self._pending = None
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,119 @@
+"""
+Re-score stored sessions after the coaching rules or lexicon change.
+
+Completed sessions whose rules_version is older than scoring.RULES_VERSION
+are read in id order, a chunk at a time, scored on a process pool with the
+same code END_SESSION uses, and written back one transaction per chunk
+(trend rollups included). Finished chunks stay finished, so an interrupted
+run picks up where it stopped when started again.
+
+    python rescore.py [--db echomind_sessions.db] [--chunk-size 500] [--processes N]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from database import SessionDatabase
+from logging_setup import setup_logging
+from scoring import RULES_VERSION, count_fillers, pace_wpm, score_session
+
+logger = logging.getLogger("echomind.rescore")
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 2.0
+
+
+def rescore_rows(rows):
+    """(session_id, scores) for one chunk under the current rules; runs in a pool process"""
+    scores = []
+    for row in rows:
+        pace = row['pace_wpm']
+        if pace is None:
+            # Scored before pace_wpm was stored: rebuilt from the rounded WPM
+            # columns, so a session right at a pace threshold may flip
+            words = row['total_words'] or 0
+            articulation_wpm = row['articulation_wpm'] or 0
+            speaking_seconds = words * 60 / articulation_wpm if articulation_wpm else 0
+            pace = pace_wpm(row['avg_wpm'] or 0, articulation_wpm, speaking_seconds)
+        scores.append((row['session_id'], score_session(
+            count_fillers(row['transcript']), pace, row['total_sentences'] or 0,
+            row['long_pause_count'] or 0)))
+    return scores
+
+
+def rescore(db, processes=None, chunk_size=500, rules_version=RULES_VERSION):
+    """Re-score every stale session; returns how many were updated"""
+    total = db.count_stale_scores(rules_version)
+    if not total:
+        logger.info("✅ Scores are current", extra={"rules_version": rules_version})
+        return 0
+
+    processes = processes or os.cpu_count() or 1
+    logger.info("🔁 Re-scoring sessions", extra={
+        "sessions": total, "rules_version": rules_version, "processes": processes})
+
+    started = time.perf_counter()
+    reported = started
+    updated = 0
+    after_id = 0
+    exhausted = False
+    scoring = deque()  # Pool futures, oldest first
+    saving = deque()   # Writer futures, oldest first
+
+    # spawn: this process already runs the SQLite writer thread
+    with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        while True:
+            # Every process busy and one chunk waiting; memory stays bounded
+            while not exhausted and len(scoring) <= processes:
+                rows = db.stale_scores(after_id, chunk_size, rules_version)
+                if not rows:
+                    exhausted = True
+                    break
+                after_id = rows[-1]['id']
+                scoring.append(pool.submit(rescore_rows, rows))
+            if not scoring:
+                break
+
+            saving.append(db.save_scores(scoring.popleft().result()))
+            # The writer lags at most one chunk behind the pool
+            while len(saving) > 1 or (saving and saving[0].done()):
+                updated += saving.popleft().result()
+
+            now = time.perf_counter()
+            if now - reported >= PROGRESS_INTERVAL:
+                reported = now
+                logger.info("⏳ Re-scoring", extra={
+                    "done": updated, "total": total, "percent": round(updated * 100 / total, 1),
+                    "rows_per_second": round(updated / (now - started))})
+
+    while saving:
+        updated += saving.popleft().result()
+
+    elapsed = time.perf_counter() - started
+    logger.info("✅ Re-scoring complete", extra={
+        "sessions": updated, "seconds": round(elapsed, 1),
+        "rows_per_second": round(updated / elapsed) if elapsed > 0 else updated})
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument("--db", default=os.getenv("ECHOMIND_DB_PATH", "echomind_sessions.db"))
+    parser.add_argument("--chunk-size", type=int, default=500, help="Sessions per read and per write transaction")
+    parser.add_argument("--processes", type=int, help="Scoring processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    setup_logging(fmt=os.getenv("ECHOMIND_LOG_FORMAT", "text"))
+    db = SessionDatabase(args.db)
+    try:
+        rescore(db, args.processes, args.chunk_size)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
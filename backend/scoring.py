@@ -0,0 +1,76 @@
+"""
+End-of-session scoring: filler breakdown, confidence score, strengths and
+improvements.
+
+The live path (SessionCoach.get_session_summary) and rescore.py, which
+re-applies the rules to stored sessions, both go through score_session.
+Bump RULES_VERSION whenever these rules or the lexicon change.
+"""
+import re
+from collections import Counter
+
+from lexicon import DEFAULT_MATCHER
+
+RULES_VERSION = 1
+
+# Below this much speech, pace is judged on wall-clock WPM
+MIN_SPEECH_SECONDS = 3.0
+
+
+def clean_text(text):
+    """Remove punctuation and normalize text"""
+    cleaned = re.sub(r'[^\w\s]', '', text.lower())
+    cleaned = ' '.join(cleaned.split())
+    return cleaned
+
+
+def count_fillers(text, matcher=DEFAULT_MATCHER):
+    """Filler counts over raw transcript text"""
+    return Counter(matcher.scan(clean_text(text)).fillers)
+
+
+def pace_wpm(avg_wpm, articulation_wpm, speaking_seconds):
+    """Judge pace on time actually spent speaking when the audio tells us"""
+    return articulation_wpm if speaking_seconds >= MIN_SPEECH_SECONDS else avg_wpm
+
+
+def score_session(filler_counter, pace, sentence_count, long_pause_count=0):
+    """Scores for one session from its filler counts, pace (WPM) and length"""
+    filler_details = dict(filler_counter.most_common())
+    total_fillers = sum(filler_counter.values())
+
+    # Calculate confidence score (0-100)
+    filler_penalty = min(total_fillers * 3, 40)
+    pace_bonus = 10 if 110 <= pace <= 160 else 0
+    confidence_score = max(60 - filler_penalty + pace_bonus, 0)
+
+    # Determine strengths
+    strengths = []
+    if total_fillers <= 5:
+        strengths.append("Clean and articulate speech")
+    if 110 <= pace <= 160:
+        strengths.append("Perfect pacing")
+    if sentence_count >= 10:
+        strengths.append("Good session length")
+
+    # Determine improvements
+    improvements = []
+    if total_fillers > 8:
+        most_common_filler = filler_counter.most_common(1)[0][0] if filler_counter else "fillers"
+        improvements.append(f"Reduce '{most_common_filler}' usage")
+    if pace > 170:
+        improvements.append("Slow down your pace")
+    elif pace < 100:
+        improvements.append("Increase energy and pace")
+    if long_pause_count >= 3:
+        improvements.append("Shorten long pauses - bridge with a quick recap")
+
+    return {
+        "filler_count": total_fillers,
+        "filler_details": filler_details,
+        "confidence_score": confidence_score,
+        "strengths": strengths if strengths else ["Keep practicing!"],
+        "improvements": improvements if improvements else ["You're doing great!"],
+        "pace_wpm": pace,
+        "rules_version": RULES_VERSION,
+    }
@@ -0,0 +1,177 @@
+"""
+Sessions that outlive their WebSocket.
+
+When a desktop client drops mid-session its live state is parked here for a
+grace period and a compact snapshot is written to SQLite. RESUME_SESSION
+with the session_id picks the state back up, from memory within the grace
+period or from the snapshot after it. Rows nobody comes back for are
+finalized in bulk by a periodic sweep.
+
+Each uvicorn worker has its own registry. The snapshot row is what they
+share: claiming a session takes its snapshot in one write transaction, and
+workers refresh last_seen for the sessions they hold.
+
+A client that reconnects before its old socket is noticed as dead takes the
+session over: the stale connection is detached (here, or on the worker that
+holds it, via a takeover request on the row) and its state handed on.
+"""
+import asyncio
+import logging
+import time
+
+from metrics import detached_sessions
+
+logger = logging.getLogger("echomind.sessions")
+
+
+class DetachedSession:
+    __slots__ = ('coach', 'gate', 'session_bytes', 'detached_at')
+
+    def __init__(self, coach, gate, session_bytes):
+        self.coach = coach
+        self.gate = gate
+        self.session_bytes = session_bytes
+        self.detached_at = time.monotonic()
+
+
+class SessionRegistry:
+    """Tracks attached and detached sessions; all methods run on the event loop"""
+
+    def __init__(self, db, grace_seconds=120.0, abandon_after=1800.0, sweep_interval=300.0,
+                 takeover_wait=10.0):
+        self.db = db
+        self.grace_seconds = grace_seconds
+        self.abandon_after = abandon_after
+        self.sweep_interval = sweep_interval
+        self.takeover_wait = takeover_wait
+
+        self.attached = set()
+        self._takeovers = {}  # session_id -> async callable that detaches the attached connection
+        self._detached = {}  # session_id -> DetachedSession
+        self._detaching = {}  # session_id -> Event set once its snapshot is stored
+        self._task = None
+        detached_sessions.set_function(lambda: len(self._detached))
+
+    def attach(self, session_id, takeover=None):
+        """takeover() detaches the connection when a newer one claims the session"""
+        self.attached.add(session_id)
+        if takeover is not None:
+            self._takeovers[session_id] = takeover
+
+    async def detach(self, session_id, coach, gate, session_bytes):
+        """Park a disconnected session and persist its snapshot"""
+        stored = self._detaching[session_id] = asyncio.Event()
+        try:
+            flushed = coach.segment_writer.flush()
+            if flushed is not None:
+                await asyncio.wrap_future(flushed)  # Snapshot counts must match the segments
+            snapshot = coach.snapshot()
+            snapshot["gate"] = gate.snapshot()
+            snapshot["session_bytes"] = session_bytes
+            await self.db.save_snapshot_async(session_id, snapshot)
+        finally:
+            self.attached.discard(session_id)
+            self._takeovers.pop(session_id, None)
+            del self._detaching[session_id]
+            stored.set()
+        # Parked only once the snapshot is stored; claims go through it
+        self._detached[session_id] = DetachedSession(coach, gate, session_bytes)
+        logger.info("🔌 Session detached", extra={"session_id": session_id})
+
+    async def claim(self, session_id):
+        """
+        Take a session back for a reconnecting client: a DetachedSession,
+        a snapshot dict (see SessionDatabase.take_snapshot_async), or None
+        if it's unknown, finished, or its holder didn't let go in time
+        """
+        if session_id in self.attached and session_id not in self._detaching:
+            # The old socket isn't known to be dead yet; the new one wins
+            await self._take_over(session_id)
+        detaching = self._detaching.get(session_id)
+        if detaching is not None:
+            await detaching.wait()  # The client reconnected before its snapshot landed
+        if session_id in self.attached:
+            return None
+        self.attached.add(session_id)
+        try:
+            # Taking the stored snapshot is the claim, even when the state is
+            # still in memory here; another worker may have resumed it since
+            snapshot = await self.db.take_snapshot_async(session_id)
+            if snapshot is None and await self.db.request_takeover_async(session_id):
+                snapshot = await self._await_remote_detach(session_id)
+        except BaseException:
+            self.attached.discard(session_id)
+            raise
+        detached = self._detached.pop(session_id, None)
+        if snapshot is None:
+            self.attached.discard(session_id)
+            return None
+        return detached if detached is not None else snapshot
+
+    def release(self, session_id):
+        """The session ended normally"""
+        self.attached.discard(session_id)
+        self._takeovers.pop(session_id, None)
+        self._detached.pop(session_id, None)
+
+    async def _take_over(self, session_id):
+        takeover = self._takeovers.get(session_id)
+        if takeover is not None:
+            logger.info("🔀 Session taken over by a new connection", extra={"session_id": session_id})
+            await takeover()
+
+    async def _await_remote_detach(self, session_id):
+        """Wait up to takeover_wait for the worker holding the session to store its snapshot"""
+        deadline = time.monotonic() + self.takeover_wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.25)
+            snapshot = await self.db.take_snapshot_async(session_id)
+            if snapshot is not None:
+                return snapshot
+        logger.warning("Session still attached elsewhere after %.0fs", self.takeover_wait,
+                       extra={"session_id": session_id})
+        return None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def expire(self):
+        """Drop in-memory state past the grace period; the snapshot stays resumable"""
+        cutoff = time.monotonic() - self.grace_seconds
+        for session_id in [sid for sid, d in self._detached.items() if d.detached_at < cutoff]:
+            del self._detached[session_id]
+            logger.info("⌛ Detached session expired from memory", extra={"session_id": session_id})
+
+    async def sweep(self):
+        """Finalize active rows nobody has touched for abandon_after seconds"""
+        exclude = self.attached | set(self._detached)
+        return await asyncio.to_thread(self.db.finalize_abandoned, self.abandon_after, exclude)
+
+    async def _serve_takeovers(self):
+        """Detach sessions a reconnect on another worker is waiting for"""
+        requested = await self.db.takeover_requests_async(list(self._takeovers))
+        for session_id in requested:
+            if session_id not in self._detaching:
+                await self._take_over(session_id)
+
+    async def _maintain(self):
+        next_sweep = 0.0
+        while True:
+            try:
+                self.expire()
+                await self._serve_takeovers()
+                if time.monotonic() >= next_sweep:
+                    next_sweep = time.monotonic() + self.sweep_interval
+                    # Other workers' sweeps only see last_seen, so keep ours fresh
+                    await self.db.touch_sessions_async(self.attached | set(self._detached))
+                    await self.sweep()
+            except Exception as e:
+                logger.error("Error in session sweep: %s", e)
+            # Short tick: a reconnect on another worker waits on _serve_takeovers
+            await asyncio.sleep(min(1.0, self.grace_seconds))
@@ -0,0 +1,248 @@
+"""
+Upstream transcription connections.
+
+A Deepgram stream is opened when a session starts, not when the desktop app
+connects. A paused stream gets the manager's KeepAlive messages instead of
+audio, and once it has been paused with nothing sent for idle_timeout it is
+closed; the session reopens one on its next audio. A live session's stream
+is never idle-closed: during silence the voice-activity gate keeps it open
+with KeepAlives of its own. A few connections are opened ahead of time so
+START_SESSION doesn't wait on a TLS handshake.
+Every open stream, pooled or in use, holds a slot of the manager's Limiter.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+
+from deepgram import LiveTranscriptionEvents
+
+from admission import LIVE, BACKGROUND
+from audio import KEEPALIVE_MESSAGE
+from metrics import deepgram_connections, deepgram_connect_latency, deepgram_acquired, deepgram_pool_size
+
+logger = logging.getLogger("echomind.transcription")
+
+
+class UpstreamStream:
+    """
+    One live connection. Event handlers are registered once and forward to
+    whichever session currently holds the stream.
+    """
+
+    def __init__(self, connection, limiter=None):
+        self.connection = connection
+        self.limiter = limiter
+        self.opened_at = time.monotonic()
+        self.last_sent = self.opened_at
+        # Last audio or gate KeepAlive from the session; the manager's own KeepAlives don't count
+        self.last_activity = self.opened_at
+        # Set by the session while paused: KeepAlives from the manager, idle-close after idle_timeout
+        self.paused = False
+        self.closed = False
+        self._finished = False
+        self.on_transcript = None
+        self.on_error = None
+        connection.on(LiveTranscriptionEvents.Transcript, self._handle_transcript)
+        connection.on(LiveTranscriptionEvents.Error, self._handle_error)
+
+    def _handle_transcript(self, _connection, result, **kwargs):
+        listener = self.on_transcript
+        if listener is not None:
+            listener(result)
+
+    def _handle_error(self, _connection, error, **kwargs):
+        listener = self.on_error
+        if listener is not None:
+            listener(error)
+        else:
+            logger.warning("⚠️ Upstream error on an idle connection: %s", error)
+
+    def attach(self, on_transcript, on_error=None):
+        self.on_transcript = on_transcript
+        self.on_error = on_error
+        self.paused = False
+        self.last_activity = time.monotonic()
+
+    def detach(self):
+        self.on_transcript = None
+        self.on_error = None
+
+    def send(self, data):
+        """Audio or a control message from the session; a failed send marks the stream closed"""
+        self.last_activity = time.monotonic()
+        return self._send(data)
+
+    def keepalive(self):
+        """The manager's KeepAlive for a quiet stream; not session activity"""
+        return self._send(KEEPALIVE_MESSAGE)
+
+    def _send(self, data):
+        if self.closed:
+            return False
+        self.last_sent = time.monotonic()
+        if not self.connection.send(data):
+            self.closed = True
+            return False
+        return True
+
+    def close(self):
+        """Blocking CloseStream and thread join; run it off the event loop"""
+        self.closed = True
+        if self._finished:
+            return
+        self._finished = True
+        self.detach()
+        try:
+            self.connection.finish()
+        except Exception as e:
+            logger.warning("⚠️ Error closing upstream connection: %s", e)
+        deepgram_connections.dec()
+        if self.limiter is not None:
+            self.limiter.release()
+
+
+class TranscriptionManager:
+    """
+    Opens, pools, keeps alive and closes upstream streams. All methods run
+    on the event loop; blocking SDK calls go through asyncio.to_thread.
+    """
+
+    def __init__(self, connect, options, limiter, pool_size=2, idle_timeout=60.0,
+                 keepalive_interval=5.0, max_warm_age=300.0, queue_timeout=10.0):
+        self.connect = connect  # Returns a new, unstarted live connection
+        self.options = options
+        self.limiter = limiter
+        self.queue_timeout = queue_timeout
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.max_warm_age = max_warm_age
+
+        self._pool = deque()
+        self._active = set()
+        self._refill_task = None
+        self._maintenance_task = None
+        deepgram_pool_size.set_function(lambda: len(self._pool))
+
+    async def start(self):
+        """Fill the warm pool and start the keepalive/idle sweep"""
+        if self._maintenance_task is None:
+            self._maintenance_task = asyncio.create_task(self._maintain())
+            self._schedule_refill()
+
+    async def stop(self):
+        for task in (self._maintenance_task, self._refill_task):
+            if task is not None:
+                task.cancel()
+        self._maintenance_task = None
+        self._refill_task = None
+        streams = list(self._pool) + list(self._active)
+        self._pool.clear()
+        self._active.clear()
+        await asyncio.gather(*(asyncio.to_thread(s.close) for s in streams))
+
+    def _open(self):
+        """Blocking: connect and start one stream; the caller already holds a limiter slot"""
+        started = time.perf_counter()
+        try:
+            connection = self.connect()
+            stream = UpstreamStream(connection, self.limiter)
+            if not connection.start(self.options):
+                raise ConnectionError("Upstream connection refused")
+        except BaseException:
+            self.limiter.release()
+            raise
+        deepgram_connections.inc()
+        deepgram_connect_latency.observe(time.perf_counter() - started)
+        return stream
+
+    async def acquire(self, on_transcript, on_error=None, on_queued=None):
+        """
+        A started stream for one session, from the warm pool when possible.
+        Raises admission.Busy if no slot frees up within queue_timeout.
+        """
+        stream = None
+        now = time.monotonic()
+        while self._pool:
+            candidate = self._pool.popleft()
+            if not candidate.closed and now - candidate.opened_at < self.max_warm_age:
+                stream = candidate
+                break
+            self._close_later(candidate)
+
+        if stream is None:
+            await self.limiter.acquire_async(LIVE, self.queue_timeout, on_queued)
+            deepgram_acquired.labels("cold").inc()
+            stream = await asyncio.to_thread(self._open)
+        else:
+            deepgram_acquired.labels("warm").inc()
+
+        stream.attach(on_transcript, on_error)
+        self._active.add(stream)
+        self._schedule_refill()
+        return stream
+
+    async def release(self, stream):
+        """Close a session's stream; streams carry stream time, so they aren't reused"""
+        if stream is None:
+            return
+        stream.detach()
+        self._active.discard(stream)
+        await asyncio.to_thread(stream.close)
+
+    def _close_later(self, stream):
+        self._active.discard(stream)
+        stream.closed = True  # Sessions see this at once and reopen on their next audio
+        asyncio.get_running_loop().run_in_executor(None, stream.close)
+
+    def _schedule_refill(self):
+        if self._maintenance_task is None or self.pool_size <= 0:
+            return
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def _refill(self):
+        while len(self._pool) < self.pool_size:
+            # Only spare capacity goes to the pool; queued sessions come first
+            if not self.limiter.try_acquire(BACKGROUND):
+                return
+            try:
+                stream = await asyncio.to_thread(self._open)
+            except Exception as e:
+                # Try again on the next sweep rather than spinning
+                logger.warning("⚠️ Could not pre-warm upstream connection: %s", e)
+                return
+            self._pool.append(stream)
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(min(self.keepalive_interval, 1.0))
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error("Error in upstream sweep: %s", e)
+
+    def sweep(self):
+        """KeepAlive quiet streams, close idle or stale ones, top up the pool"""
+        now = time.monotonic()
+
+        for stream in list(self._pool):
+            if stream.closed or now - stream.opened_at >= self.max_warm_age:
+                self._pool.remove(stream)
+                self._close_later(stream)
+            elif now - stream.last_sent >= self.keepalive_interval:
+                stream.keepalive()
+
+        for stream in list(self._active):
+            if stream.closed:
+                continue
+            if stream.paused and now - stream.last_activity >= self.idle_timeout:
+                logger.info("💤 Closing idle paused upstream connection", extra={
+                    "idle_seconds": round(now - stream.last_activity)})
+                self._close_later(stream)
+            elif now - stream.last_sent >= self.keepalive_interval:
+                # Paused sessions send nothing; without this Deepgram drops them after ~10 s
+                stream.keepalive()
+
+        self._schedule_refill()
@@ -7,6 +7,9 @@ let overlayWindow;
 let ws;
 let micInstance;
 let isRecording = false;
+let sessionId = null;       // Backend session to resume after a reconnect
+let sessionPaused = false;
+let reconnectDelay = 1000;
 
 function createOverlay() {
   const primaryDisplay = screen.getPrimaryDisplay();
@@ -43,10 +46,23 @@ function connectWebSocket() {
   
   ws.on('open', () => {
     console.log('✅ Connected to backend');
+    reconnectDelay = 1000;
+    if (sessionId) {
+      console.log('🔁 Resuming session', sessionId);
+      ws.send(JSON.stringify({ type: 'RESUME_SESSION', session_id: sessionId, paused: sessionPaused }));
+    }
   });
   
   ws.on('message', (data) => {
     const message = JSON.parse(data);
+    if (message.type === 'SESSION_STARTED') {
+      sessionId = message.session_id;
+    } else if (message.type === 'SESSION_SUMMARY') {
+      sessionId = null;
+    } else if (message.type === 'RESUME_FAILED') {
+      sessionId = null;
+      stopMicrophone();
+    }
     overlayWindow.webContents.send('backend-message', message);
   });
   
@@ -56,6 +72,8 @@ function connectWebSocket() {
   
   ws.on('close', () => {
     console.log('❌ Disconnected from backend');
+    setTimeout(connectWebSocket, reconnectDelay);
+    reconnectDelay = Math.min(reconnectDelay * 2, 30000);
   });
 }
 
@@ -98,6 +116,7 @@ function stopMicrophone() {
 // Handle control commands from overlay
 ipcMain.on('start-session', () => {
   console.log('▶️ Starting session...');
+  sessionPaused = false;
   startMicrophone();
   if (ws && ws.readyState === WebSocket.OPEN) {
     ws.send(JSON.stringify({ type: 'START_SESSION' }));
@@ -106,6 +125,7 @@ ipcMain.on('start-session', () => {
 
 ipcMain.on('pause-session', () => {
   console.log('⏸️ Pausing session...');
+  sessionPaused = true;
   if (ws && ws.readyState === WebSocket.OPEN) {
     ws.send(JSON.stringify({ type: 'PAUSE_SESSION' }));
   }
@@ -113,6 +133,7 @@ ipcMain.on('pause-session', () => {
 
 ipcMain.on('resume-session', () => {
   console.log('▶️ Resuming session...');
+  sessionPaused = false;
   if (ws && ws.readyState === WebSocket.OPEN) {
     ws.send(JSON.stringify({ type: 'RESUME_SESSION' }));
   }
@@ -121,6 +142,7 @@ ipcMain.on('resume-session', () => {
 ipcMain.on('end-session', () => {
   console.log('⏹️ Ending session...');
   stopMicrophone();
+  sessionId = null;
   if (ws && ws.readyState === WebSocket.OPEN) {
     ws.send(JSON.stringify({ type: 'END_SESSION' }));
   }